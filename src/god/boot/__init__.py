@@ -6,7 +6,7 @@ This module handles loading and booting Linux kernels on ARM64.
 
 from .kernel import KernelImage, KernelError
 from .dtb import DeviceTreeGenerator, DTBConfig
-from .loader import BootInfo, BootLoader
+from .loader import BootInfo, BootLoader, BootPlan
 
 __all__ = [
     "KernelImage",
@@ -15,4 +15,5 @@ __all__ = [
     "DTBConfig",
     "BootInfo",
     "BootLoader",
+    "BootPlan",
 ]
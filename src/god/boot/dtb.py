@@ -7,8 +7,15 @@ our virtual machine's hardware to the Linux kernel.
 We use the fdt (Flattened Device Tree) library for DTB generation.
 """
 
+import struct
 from dataclasses import dataclass
 
+try:
+    import fdt as _fdt
+except ImportError:
+    # Reported with an install hint when generate() is called
+    _fdt = None
+
 from god.devices.timer import Timer
 from god.vm.layout import (
     GIC_DISTRIBUTOR,
@@ -18,12 +25,102 @@ from god.vm.layout import (
     UART_IRQ,
 )
 
+# Node unit addresses and paths. The layout is fixed, so format them once.
+_UART_HEX = f"{UART.base:x}"
+_RAM_HEX = f"{RAM_BASE:x}"
+_GICD_HEX = f"{GIC_DISTRIBUTOR.base:x}"
+_SERIAL0 = f"/soc/pl011@{_UART_HEX}"
+
+
+def _cells(value: int) -> tuple[int, int]:
+    """Split a 64-bit value into (high, low) 32-bit cells for #*-cells = 2."""
+    return value >> 32, value & 0xFFFFFFFF
+
+
+# <addr_hi addr_lo [size_hi size_lo]> cells for the fixed regions
+_RAM_BASE_CELLS = _cells(RAM_BASE)
+_GICD_CELLS = (*_cells(GIC_DISTRIBUTOR.base), *_cells(GIC_DISTRIBUTOR.size))
+_GICR_CELLS = (*_cells(GIC_REDISTRIBUTOR.base), *_cells(GIC_REDISTRIBUTOR.size))
+_UART_CELLS = (*_cells(UART.base), *_cells(UART.size))
+
+# Structure block tokens and header values from the Device Tree specification
+_DTB_BEGIN_NODE = 0x00000001
+_DTB_END_NODE = 0x00000002
+_DTB_PROP = 0x00000003
+_DTB_END = 0x00000009
+_DTB_MAGIC = 0xD00DFEED
+_DTB_VERSION = 17
+_DTB_LAST_COMP_VERSION = 16
+
+# Property header (token, value length, name offset) and one 32-bit cell
+_HDR = struct.Struct(">III")
+_U32 = struct.Struct(">I")
+
+# The 10-word v17 header. The memory reservation map that follows it only
+# holds its terminating (address=0, size=0) entry, then the structure block.
+_FDT_HEADER = struct.Struct(">10I")
+_OFF_RSVMAP = _FDT_HEADER.size
+_OFF_STRUCT = _OFF_RSVMAP + 16
+
+# How many DTBs each generator keeps, oldest evicted first
+_CACHE_SIZE = 8
+
+
+def _serialize(item: "_fdt.Node | _fdt.Property", strings: str, out: bytearray) -> str:
+    """
+    Append the structure block encoding of a (non-root) node or property.
+
+    This produces the same bytes as fdt's own to_dtb() for version 17,
+    where property values are never realigned. PropWords are packed here
+    with a single struct call: some fdt releases build their value with
+    `blob += pack(...)` per cell, which is quadratic in the number of
+    cells. Other property types are left to fdt.
 
-@dataclass
+    Args:
+        item: The node or property to serialize
+        strings: The strings table so far
+        out: Buffer the encoding is appended to
+
+    Returns:
+        The strings table, with any new property names appended
+    """
+    if isinstance(item, _fdt.Node):
+        # Node names are NUL-terminated and padded to a 32-bit boundary
+        name = item.name.encode("ascii") + b"\0"
+        out += _U32.pack(_DTB_BEGIN_NODE)
+        out += name
+        out += bytes(-len(name) % 4)
+        for prop in item.props:
+            # fdt keeps reference bookkeeping in phantom properties that
+            # aren't part of the tree
+            if not prop.name.endswith("_with_references"):
+                strings = _serialize(prop, strings, out)
+        for node in item.nodes:
+            strings = _serialize(node, strings, out)
+        out += _U32.pack(_DTB_END_NODE)
+    elif isinstance(item, _fdt.PropWords):
+        strpos = strings.find(item.name + "\0")
+        if strpos < 0:
+            strpos = len(strings)
+            strings += item.name + "\0"
+        words = item.data
+        out += _HDR.pack(_DTB_PROP, len(words) * 4, strpos)
+        out += struct.pack(f">{len(words)}I", *words)
+    else:
+        blob, strings, _ = item.to_dtb(strings, 0, _DTB_VERSION)
+        out += blob
+    return strings
+
+
+@dataclass(frozen=True)
 class DTBConfig:
     """
     Configuration for DTB generation.
 
+    The config is frozen so it can be used as a cache key: asking a
+    generator for a DTB for a config it has already seen returns the
+    cached bytes.
+
     Attributes:
         ram_size: Guest RAM size in bytes
         cmdline: Kernel command line
@@ -57,6 +154,69 @@ class DeviceTreeGenerator:
         dtb_bytes = gen.generate(config)
     """
 
+    def __init__(self):
+        """
+        Create a generator.
+
+        Most of the tree (PSCI, GIC, timer, clock, SOC/UART, aliases) doesn't
+        depend on the configuration, so we build those nodes once here and
+        serialize them into a binary template. Each generate() call on this
+        generator only creates and serializes the memory, cpus and chosen
+        nodes.
+        """
+        # Generated DTBs by config. The bytes are immutable, so repeated
+        # boots with the same config can share one blob.
+        self._cache: dict[DTBConfig, bytes] = {}
+        if _fdt is not None:
+            self._create_template()
+
+    def _create_template(self) -> None:
+        """
+        Serialize the configuration-independent parts of the structure block.
+
+        The structure block is laid out as:
+
+            BEGIN_NODE "/", root properties, aliases      <- constant prefix
+            chosen, memory, cpus                          <- per config
+            psci, gic, timer, clock, soc, END_NODE, END   <- constant suffix
+
+        We serialize the prefix and suffix once, collecting the property
+        names they use into a seed strings table. Names first seen in the
+        per-config nodes are appended to the end of that table, so the name
+        offsets baked into the template stay valid.
+        """
+        root_props = (
+            _fdt.PropStrings("compatible", "linux,dummy-virt"),
+            _fdt.PropWords("#address-cells", 2),
+            _fdt.PropWords("#size-cells", 2),
+        )
+
+        # The root node's name is empty, padded to one 32-bit word
+        prefix = bytearray(_U32.pack(_DTB_BEGIN_NODE) + bytes(4))
+        strings = ""
+        for item in (*root_props, self._create_aliases()):
+            strings = _serialize(item, strings, prefix)
+
+        suffix = bytearray()
+        for node in self._create_constant_nodes():
+            strings = _serialize(node, strings, suffix)
+        suffix += _U32.pack(_DTB_END_NODE) + _U32.pack(_DTB_END)
+
+        self._struct_prefix = bytes(prefix)
+        self._struct_suffix = bytes(suffix)
+        self._strings = strings
+
+    def _create_constant_nodes(self) -> tuple["_fdt.Node", ...]:
+        """Create the configuration-independent nodes that follow the cpus node."""
+        return (
+            self._create_psci(),
+            self._create_gic(),
+            self._create_timer(),
+            self._create_clock(),
+            # SOC node containing platform devices
+            self._create_soc(),
+        )
+
     def generate(self, config: DTBConfig) -> bytes:
         """
         Generate a DTB for the given configuration.
@@ -67,239 +227,186 @@ class DeviceTreeGenerator:
         Returns:
             DTB as bytes
         """
-        try:
-            import fdt
-        except ImportError:
+        if _fdt is None:
             raise ImportError(
                 "fdt is required for DTB generation. " "Install it with: uv add fdt"
             )
 
-        # Create root node
-        root = fdt.Node("/")
-        root.append(fdt.PropStrings("compatible", "linux,dummy-virt"))
-        root.append(fdt.PropWords("#address-cells", 2))
-        root.append(fdt.PropWords("#size-cells", 2))
-
-        # Add all nodes
-        root.append(self._create_aliases())
-        root.append(self._create_chosen(config))
-        root.append(self._create_memory(config))
-        root.append(self._create_cpus(config))
-        root.append(self._create_psci())
-        root.append(self._create_gic())
-        root.append(self._create_timer())
-        root.append(self._create_clock())
-
-        # Add SOC node containing platform devices
-        root.append(self._create_soc())
-
-        # Create the FDT and convert to bytes
-        dt = fdt.FDT()
-        dt.root = root
-
-        # Version 17 is the most common/standard DTB version
-        return dt.to_dtb(version=17)
-
-    def _create_aliases(self) -> "fdt.Node":
-        """Create the aliases node for device naming."""
-        import fdt
+        dtb = self._cache.get(config)
+        if dtb is None:
+            if len(self._cache) >= _CACHE_SIZE:
+                # Dicts keep insertion order, so the first key is the oldest
+                del self._cache[next(iter(self._cache))]
+            dtb = self._cache[config] = self._build(config)
+        return dtb
+
+    def _build(self, config: DTBConfig) -> bytes:
+        """Serialize the per-config nodes and splice them into the template."""
+        # Everything goes into one buffer: reserve room for the header and
+        # reservation map up front, append the structure and strings blocks,
+        # then pack the header in place once the block sizes are known.
+        blob = bytearray(_OFF_STRUCT)
+        blob += self._struct_prefix
+        strings = self._strings
+        for node in (
+            self._create_chosen(config),
+            self._create_memory(config),
+            self._create_cpus(config),
+        ):
+            strings = _serialize(node, strings, blob)
+        blob += self._struct_suffix
+
+        off_strings = len(blob)
+        blob.extend(strings.encode("ascii"))
+
+        # The reservation map is already zeroed, which is its terminator
+        _FDT_HEADER.pack_into(
+            blob,
+            0,
+            _DTB_MAGIC,
+            len(blob),  # totalsize
+            _OFF_STRUCT,
+            off_strings,
+            _OFF_RSVMAP,
+            _DTB_VERSION,
+            _DTB_LAST_COMP_VERSION,
+            0,  # boot_cpuid_phys
+            len(blob) - off_strings,  # size_dt_strings
+            off_strings - _OFF_STRUCT,  # size_dt_struct
+        )
+        return bytes(blob)
 
-        aliases = fdt.Node("aliases")
-        aliases.append(fdt.PropStrings("serial0", f"/soc/pl011@{UART.base:x}"))
+    def _create_aliases(self) -> "_fdt.Node":
+        """Create the aliases node for device naming."""
+        aliases = _fdt.Node("aliases")
+        aliases.append(_fdt.PropStrings("serial0", _SERIAL0))
         return aliases
 
-    def _create_chosen(self, config: DTBConfig) -> "fdt.Node":
+    def _create_chosen(self, config: DTBConfig) -> "_fdt.Node":
         """Create the chosen node (boot configuration)."""
-        import fdt
-
-        chosen = fdt.Node("chosen")
-        chosen.append(fdt.PropStrings("bootargs", config.cmdline))
-        chosen.append(fdt.PropStrings("stdout-path", f"/soc/pl011@{UART.base:x}"))
+        chosen = _fdt.Node("chosen")
+        chosen.append(_fdt.PropStrings("bootargs", config.cmdline))
+        chosen.append(_fdt.PropStrings("stdout-path", _SERIAL0))
 
         # Add initramfs location if present
         if config.initrd_start != 0 and config.initrd_end != 0:
             # These are 64-bit addresses stored as two 32-bit values
-            chosen.append(
-                fdt.PropWords(
-                    "linux,initrd-start",
-                    config.initrd_start >> 32,
-                    config.initrd_start & 0xFFFFFFFF,
-                )
-            )
-            chosen.append(
-                fdt.PropWords(
-                    "linux,initrd-end",
-                    config.initrd_end >> 32,
-                    config.initrd_end & 0xFFFFFFFF,
-                )
-            )
+            chosen.append(_fdt.PropWords("linux,initrd-start", *_cells(config.initrd_start)))
+            chosen.append(_fdt.PropWords("linux,initrd-end", *_cells(config.initrd_end)))
 
         return chosen
 
-    def _create_memory(self, config: DTBConfig) -> "fdt.Node":
+    def _create_memory(self, config: DTBConfig) -> "_fdt.Node":
         """Create the memory node."""
-        import fdt
-
-        mem = fdt.Node(f"memory@{RAM_BASE:x}")
-        mem.append(fdt.PropStrings("device_type", "memory"))
+        mem = _fdt.Node(f"memory@{_RAM_HEX}")
+        mem.append(_fdt.PropStrings("device_type", "memory"))
 
         # reg = <addr_hi addr_lo size_hi size_lo>
-        mem.append(
-            fdt.PropWords(
-                "reg",
-                RAM_BASE >> 32,
-                RAM_BASE & 0xFFFFFFFF,
-                config.ram_size >> 32,
-                config.ram_size & 0xFFFFFFFF,
-            )
-        )
+        mem.append(_fdt.PropWords("reg", *_RAM_BASE_CELLS, *_cells(config.ram_size)))
 
         return mem
 
-    def _create_cpus(self, config: DTBConfig) -> "fdt.Node":
+    def _create_cpus(self, config: DTBConfig) -> "_fdt.Node":
         """Create the cpus node."""
-        import fdt
-
-        cpus = fdt.Node("cpus")
-        cpus.append(fdt.PropWords("#address-cells", 1))
-        cpus.append(fdt.PropWords("#size-cells", 0))
+        cpus = _fdt.Node("cpus")
+        cpus.append(_fdt.PropWords("#address-cells", 1))
+        cpus.append(_fdt.PropWords("#size-cells", 0))
 
         for i in range(config.num_cpus):
-            cpu = fdt.Node(f"cpu@{i}")
-            cpu.append(fdt.PropStrings("device_type", "cpu"))
-            cpu.append(fdt.PropStrings("compatible", "arm,cortex-a57"))
-            cpu.append(fdt.PropWords("reg", i))
-            cpu.append(fdt.PropStrings("enable-method", "psci"))
+            cpu = _fdt.Node(f"cpu@{i}")
+            cpu.append(_fdt.PropStrings("device_type", "cpu"))
+            cpu.append(_fdt.PropStrings("compatible", "arm,cortex-a57"))
+            cpu.append(_fdt.PropWords("reg", i))
+            cpu.append(_fdt.PropStrings("enable-method", "psci"))
             cpus.append(cpu)
 
         return cpus
 
-    def _create_psci(self) -> "fdt.Node":
+    def _create_psci(self) -> "_fdt.Node":
         """Create the PSCI node."""
-        import fdt
-
-        psci = fdt.Node("psci")
-        psci.append(fdt.PropStrings("compatible", "arm,psci-1.0", "arm,psci-0.2"))
-        psci.append(fdt.PropStrings("method", "hvc"))
+        psci = _fdt.Node("psci")
+        psci.append(_fdt.PropStrings("compatible", "arm,psci-1.0", "arm,psci-0.2"))
+        psci.append(_fdt.PropStrings("method", "hvc"))
 
         return psci
 
-    def _create_gic(self) -> "fdt.Node":
+    def _create_gic(self) -> "_fdt.Node":
         """Create the GIC interrupt controller node."""
-        import fdt
-
-        gic = fdt.Node(f"interrupt-controller@{GIC_DISTRIBUTOR.base:x}")
-        gic.append(fdt.PropStrings("compatible", "arm,gic-v3"))
-        gic.append(fdt.PropWords("#interrupt-cells", 3))
-        gic.append(fdt.Property("interrupt-controller"))
+        gic = _fdt.Node(f"interrupt-controller@{_GICD_HEX}")
+        gic.append(_fdt.PropStrings("compatible", "arm,gic-v3"))
+        gic.append(_fdt.PropWords("#interrupt-cells", 3))
+        gic.append(_fdt.Property("interrupt-controller"))
 
         # reg = <dist_addr dist_size redist_addr redist_size>
-        gic.append(
-            fdt.PropWords(
-                "reg",
-                GIC_DISTRIBUTOR.base >> 32,
-                GIC_DISTRIBUTOR.base & 0xFFFFFFFF,
-                GIC_DISTRIBUTOR.size >> 32,
-                GIC_DISTRIBUTOR.size & 0xFFFFFFFF,
-                GIC_REDISTRIBUTOR.base >> 32,
-                GIC_REDISTRIBUTOR.base & 0xFFFFFFFF,
-                GIC_REDISTRIBUTOR.size >> 32,
-                GIC_REDISTRIBUTOR.size & 0xFFFFFFFF,
-            )
-        )
+        gic.append(_fdt.PropWords("reg", *_GICD_CELLS, *_GICR_CELLS))
 
         # Set phandle so other nodes can reference this
-        gic.append(fdt.PropWords("phandle", 1))
+        gic.append(_fdt.PropWords("phandle", 1))
 
         return gic
 
-    def _create_timer(self) -> "fdt.Node":
+    def _create_timer(self) -> "_fdt.Node":
         """Create the ARM timer node."""
-        import fdt
-
-        timer_node = fdt.Node("timer")
-        timer_node.append(fdt.PropStrings("compatible", "arm,armv8-timer"))
+        timer_node = _fdt.Node("timer")
+        timer_node.append(_fdt.PropStrings("compatible", "arm,armv8-timer"))
 
         # Reference the GIC as interrupt parent (phandle 1)
-        timer_node.append(fdt.PropWords("interrupt-parent", 1))
-
-        # Timer interrupts (4 PPIs)
-        # Format: <type number flags> for each
-        timer = Timer()
-        interrupts = []
-        for ppi in [
-            timer.ppi_secure_phys,  # 29 -> DT 13
-            timer.ppi_nonsecure_phys,  # 30 -> DT 14
-            timer.ppi_virtual,  # 27 -> DT 11
-            timer.ppi_hypervisor,  # 26 -> DT 10
-        ]:
-            dt_num = ppi - 16  # Convert to DT-relative number
-            # PPI type = 1, flags = 4 (level triggered)
-            interrupts.extend([1, dt_num, 4])
-
-        timer_node.append(fdt.PropWords("interrupts", *interrupts))
-        timer_node.append(fdt.Property("always-on"))
+        timer_node.append(_fdt.PropWords("interrupt-parent", 1))
+
+        # Timer interrupts (4 PPIs: secure, non-secure, virtual, hypervisor)
+        # Format: <type number flags> for each, already converted to the
+        # DT-relative PPI numbers by Timer
+        interrupts = Timer().get_device_tree_props()["interrupts"]
+        timer_node.append(_fdt.PropWords("interrupts", *interrupts))
+        timer_node.append(_fdt.Property("always-on"))
 
         return timer_node
 
-    def _create_soc(self) -> "fdt.Node":
+    def _create_soc(self) -> "_fdt.Node":
         """Create the SOC node containing platform devices."""
-        import fdt
-
-        soc = fdt.Node("soc")
-        soc.append(fdt.PropStrings("compatible", "simple-bus"))
-        soc.append(fdt.PropWords("#address-cells", 2))
-        soc.append(fdt.PropWords("#size-cells", 2))
-        soc.append(fdt.Property("ranges"))
+        soc = _fdt.Node("soc")
+        soc.append(_fdt.PropStrings("compatible", "simple-bus"))
+        soc.append(_fdt.PropWords("#address-cells", 2))
+        soc.append(_fdt.PropWords("#size-cells", 2))
+        soc.append(_fdt.Property("ranges"))
 
         # Add UART inside the soc node
         soc.append(self._create_uart())
 
         return soc
 
-    def _create_uart(self) -> "fdt.Node":
+    def _create_uart(self) -> "_fdt.Node":
         """Create the PL011 UART node."""
-        import fdt
-
-        uart = fdt.Node(f"pl011@{UART.base:x}")
-        uart.append(fdt.PropStrings("compatible", "arm,pl011", "arm,primecell"))
-        uart.append(fdt.PropStrings("status", "okay"))
+        uart = _fdt.Node(f"pl011@{_UART_HEX}")
+        uart.append(_fdt.PropStrings("compatible", "arm,pl011", "arm,primecell"))
+        uart.append(_fdt.PropStrings("status", "okay"))
         # PL011 peripheral ID for AMBA identification
-        uart.append(fdt.PropWords("arm,primecell-periphid", 0x00241011))
-
-        uart.append(
-            fdt.PropWords(
-                "reg",
-                UART.base >> 32,
-                UART.base & 0xFFFFFFFF,
-                UART.size >> 32,
-                UART.size & 0xFFFFFFFF,
-            )
-        )
+        uart.append(_fdt.PropWords("arm,primecell-periphid", 0x00241011))
+
+        uart.append(_fdt.PropWords("reg", *_UART_CELLS))
 
         # Reference the GIC as interrupt parent (phandle 1)
-        uart.append(fdt.PropWords("interrupt-parent", 1))
+        uart.append(_fdt.PropWords("interrupt-parent", 1))
 
         # UART interrupt: SPI 1, level triggered
         # <type=0(SPI) number=1 flags=4(level)>
         spi_num = UART_IRQ - 32  # Convert to SPI number
-        uart.append(fdt.PropWords("interrupts", 0, spi_num, 4))
+        uart.append(_fdt.PropWords("interrupts", 0, spi_num, 4))
 
         # Clock references
-        uart.append(fdt.PropStrings("clock-names", "uartclk", "apb_pclk"))
+        uart.append(_fdt.PropStrings("clock-names", "uartclk", "apb_pclk"))
         # Reference the clock phandle (we'll use phandle 2)
-        uart.append(fdt.PropWords("clocks", 2, 2))
+        uart.append(_fdt.PropWords("clocks", 2, 2))
 
         return uart
 
-    def _create_clock(self) -> "fdt.Node":
+    def _create_clock(self) -> "_fdt.Node":
         """Create the fixed clock node for UART."""
-        import fdt
-
-        clock = fdt.Node("apb-pclk")
-        clock.append(fdt.PropStrings("compatible", "fixed-clock"))
-        clock.append(fdt.PropWords("#clock-cells", 0))
-        clock.append(fdt.PropWords("clock-frequency", 24000000))  # 24 MHz
-        clock.append(fdt.PropWords("phandle", 2))
+        clock = _fdt.Node("apb-pclk")
+        clock.append(_fdt.PropStrings("compatible", "fixed-clock"))
+        clock.append(_fdt.PropWords("#clock-cells", 0))
+        clock.append(_fdt.PropWords("clock-frequency", 24000000))  # 24 MHz
+        clock.append(_fdt.PropWords("phandle", 2))
 
         return clock
+
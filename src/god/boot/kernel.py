@@ -5,9 +5,11 @@ This module parses the ARM64 kernel Image header to extract
 boot parameters like text_offset and image_size.
 """
 
+import os
 import struct
 from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO
 
 
 class KernelError(Exception):
@@ -19,6 +21,10 @@ class KernelError(Exception):
 # ARM64 kernel magic number: "ARM\x64" in little-endian
 ARM64_MAGIC = 0x644D5241
 
+# The 64-byte ARM64 Image header (see KernelImage.load for the field layout)
+_ARM64_HDR = struct.Struct("<IIQQQQQQII")
+assert _ARM64_HDR.size == 64, "ARM64 Image header format must describe 64 bytes"
+
 
 @dataclass
 class KernelImage:
@@ -34,14 +40,14 @@ class KernelImage:
         text_offset: Offset from RAM base where kernel should be loaded
         image_size: Size of the kernel image in bytes
         flags: Kernel flags (endianness, page size, etc.)
-        data: Raw kernel image bytes
+        file_size: Size of the kernel Image file in bytes
     """
 
     path: Path
     text_offset: int
     image_size: int
     flags: int
-    data: bytes
+    file_size: int
 
     @classmethod
     def load(cls, path: str | Path) -> "KernelImage":
@@ -59,12 +65,33 @@ class KernelImage:
             FileNotFoundError: If the file doesn't exist
         """
         path = Path(path)
-
         with open(path, "rb") as f:
-            data = f.read()
+            return cls.from_file(f, path)
+
+    @classmethod
+    def from_file(cls, f: BinaryIO, path: str | Path) -> "KernelImage":
+        """
+        Parse the header of an already-open ARM64 kernel image.
+
+        Only the 64-byte header is read. The kernel itself can be tens of
+        MB, so callers that need its contents read it straight into guest
+        memory from the same file (see MemoryManager.load_fd).
+
+        Args:
+            f: The kernel Image file, opened in binary mode
+            path: Path the file was opened from
+
+        Returns:
+            Parsed KernelImage
 
-        if len(data) < 64:
-            raise KernelError(f"File too small ({len(data)} bytes) - not a valid kernel")
+        Raises:
+            KernelError: If the file is not a valid ARM64 kernel
+        """
+        fd = f.fileno()
+        file_size = os.fstat(fd).st_size
+        if file_size < _ARM64_HDR.size:
+            raise KernelError(f"File too small ({file_size} bytes) - not a valid kernel")
+        header = os.pread(fd, _ARM64_HDR.size, 0)
 
         # Parse the 64-byte header
         # struct arm64_image_header {
@@ -91,7 +118,7 @@ class KernelImage:
             res4,
             magic,
             res5,
-        ) = struct.unpack("<IIQQQQQQ II", data[:64])
+        ) = _ARM64_HDR.unpack(header)
 
         # Verify magic number
         if magic != ARM64_MAGIC:
@@ -113,14 +140,14 @@ class KernelImage:
         # Sanity check image_size
         if image_size == 0:
             # Use actual file size
-            image_size = len(data)
+            image_size = file_size
 
         return cls(
-            path=path,
+            path=Path(path),
             text_offset=text_offset,
             image_size=image_size,
             flags=flags,
-            data=data,
+            file_size=file_size,
         )
 
     @property
@@ -5,6 +5,8 @@ This module handles loading the kernel, initramfs, and DTB into
 guest memory and setting up the vCPU state for boot.
 """
 
+import logging
+import os
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -12,13 +14,23 @@ from god.vcpu import registers
 from god.vm.layout import RAM_BASE
 from god.vm.memory import MemoryManager
 
+_log = logging.getLogger(__name__)
+
+# Granule used to align the initramfs, DTB and early stack
+_PAGE_SIZE = 4096
+
+
+def _page_align(addr: int, page: int = _PAGE_SIZE) -> int:
+    """Round addr up to the next multiple of page (a power of two)."""
+    return (addr + page - 1) & -page
+
 
 @dataclass
 class BootInfo:
     """
     Information about loaded boot components.
 
-    This is returned by BootLoader.load() and contains all the
+    This is returned by BootLoader.execute() and contains all the
     addresses and sizes needed to boot the kernel.
 
     Attributes:
@@ -43,6 +55,45 @@ class BootInfo:
         return self.initrd_addr + self.initrd_size
 
 
+@dataclass(frozen=True, slots=True)
+class BootPlan:
+    """
+    Where each boot component will be loaded, before anything is.
+
+    This is returned by BootLoader.plan(). Generating the DTB from the
+    plan and then loading with BootLoader.execute() guarantees the DTB
+    describes exactly where the initramfs ends up.
+
+    Attributes:
+        kernel_path: Path to the kernel Image file
+        kernel_addr: Guest physical address of kernel
+        kernel_size: Size of kernel in bytes
+        initrd_path: Path to the initramfs (None if none, or if the
+                     caller will pass an open file to execute())
+        initrd_addr: Guest physical address of initramfs (0 if none)
+        initrd_size: Size of initramfs in bytes (0 if none)
+        dtb_addr: Guest physical address of DTB
+    """
+
+    kernel_path: Path
+    kernel_addr: int
+    kernel_size: int
+    initrd_path: Path | None
+    initrd_addr: int
+    initrd_size: int
+    dtb_addr: int
+
+    @property
+    def kernel_end(self) -> int:
+        """End address of the kernel."""
+        return self.kernel_addr + self.kernel_size
+
+    @property
+    def initrd_end(self) -> int:
+        """End address of initramfs (for Device Tree)."""
+        return self.initrd_addr + self.initrd_size
+
+
 class BootLoader:
     """
     Loads Linux boot components into guest memory.
@@ -55,12 +106,13 @@ class BootLoader:
 
     Usage:
         loader = BootLoader(memory, ram_size)
-        boot_info = loader.load(
-            kernel_path="Image",
-            initrd_path="initramfs.cpio",
-            dtb_data=dtb_bytes,
-        )
+        plan = loader.plan("Image", initrd_path="initramfs.cpio")
+        dtb_bytes = ...  # generated from plan.initrd_addr / plan.initrd_end
+        boot_info = loader.execute(plan, dtb_bytes)
         loader.setup_vcpu(vcpu, boot_info)
+
+    When the DTB doesn't depend on the load addresses, load() does both
+    steps at once.
     """
 
     def __init__(self, memory: MemoryManager, ram_size: int):
@@ -75,92 +127,170 @@ class BootLoader:
         self._ram_size = ram_size
         self._ram_base = RAM_BASE
 
-    def load(
+    def plan(
         self,
         kernel_path: str | Path,
         initrd_path: str | Path | None = None,
-        dtb_data: bytes | None = None,
-    ) -> BootInfo:
+        initrd_size: int | None = None,
+    ) -> BootPlan:
         """
-        Load boot components into guest memory.
+        Work out where each boot component will be loaded.
+
+        Nothing is written to guest memory: we only parse the kernel
+        header and size the initramfs. The returned plan is what the DTB
+        should describe, and what execute() then loads.
 
         Args:
             kernel_path: Path to kernel Image file
             initrd_path: Path to initramfs (optional)
-            dtb_data: DTB blob bytes (required)
+            initrd_size: Size of the initramfs, if the caller already
+                         knows it (saves a stat of initrd_path)
 
         Returns:
-            BootInfo with addresses of loaded components
+            BootPlan with the address of every component
 
         Raises:
-            ValueError: If dtb_data is not provided
+            KernelError: If the kernel is not a valid ARM64 Image
         """
         from .kernel import KernelImage
 
-        if dtb_data is None:
-            raise ValueError("DTB data is required")
-
-        # Load kernel
         kernel = KernelImage.load(kernel_path)
         kernel_addr = self._ram_base + kernel.text_offset
-        self._memory.write(kernel_addr, kernel.data)
-        print(f"Loaded kernel at 0x{kernel_addr:08x} ({len(kernel.data)} bytes)")
-
-        # Calculate where initramfs goes
-        # Place it high in RAM (at 128MB offset) to avoid conflicts with
-        # early kernel allocations which tend to be at low addresses
-        kernel_end = kernel_addr + len(kernel.data)
-        initrd_addr = self._ram_base + (128 * 1024 * 1024)  # 128 MB into RAM
-        initrd_addr = (initrd_addr + 0xFFF) & ~0xFFF  # Align to 4KB
-
-        # Load initramfs
-        initrd_size = 0
-        next_addr = initrd_addr
-        if initrd_path is not None:
-            initrd_path = Path(initrd_path)
-            with open(initrd_path, "rb") as f:
-                initrd_data = f.read()
-            self._memory.write(initrd_addr, initrd_data)
-            initrd_size = len(initrd_data)
-            next_addr = initrd_addr + initrd_size
-
-            # Debug: verify initramfs was loaded correctly
-            readback = self._memory.read(initrd_addr, 16)
-            magic_str = " ".join(f"{b:02x}" for b in readback[:8])
-            print(f"Loaded initramfs at 0x{initrd_addr:08x} ({initrd_size} bytes)")
-            print(f"  First 8 bytes: {magic_str}")
-            if readback[:2] == b'\x1f\x8b':
-                print("  Format: gzip compressed")
-            elif readback[:6] == b'070701':
-                print("  Format: cpio newc (uncompressed)")
-            else:
-                print(f"  Format: unknown (expected 1f 8b for gzip or 070701 for cpio)")
 
-        # Place DTB right after initramfs (or kernel if no initramfs)
-        # DTB must be:
+        # Place the initramfs high in RAM (at 128MB offset) to avoid
+        # conflicts with early kernel allocations, which tend to be at
+        # low addresses
+        initrd_addr = _page_align(self._ram_base + (128 * 1024 * 1024))
+        if initrd_size is None:
+            initrd_size = os.stat(initrd_path).st_size if initrd_path is not None else 0
+
+        # Place DTB right after initramfs (or where it would go if there is
+        # none). DTB must be:
         # - 8-byte aligned
         # - Within kernel's initial page table mapping (close to kernel)
         # - Not overlapping with kernel or initramfs
-        dtb_addr = (next_addr + 0xFFF) & ~0xFFF  # Align to 4KB
-        self._memory.write(dtb_addr, dtb_data)
-        print(f"Loaded DTB at 0x{dtb_addr:08x} ({len(dtb_data)} bytes)")
+        dtb_addr = _page_align(initrd_addr + initrd_size)
 
-        boot_info = BootInfo(
+        return BootPlan(
+            kernel_path=Path(kernel_path),
             kernel_addr=kernel_addr,
-            kernel_size=len(kernel.data),
+            kernel_size=kernel.file_size,
+            initrd_path=Path(initrd_path) if initrd_path is not None else None,
             initrd_addr=initrd_addr if initrd_size > 0 else 0,
             initrd_size=initrd_size,
             dtb_addr=dtb_addr,
+        )
+
+    def execute(
+        self,
+        plan: BootPlan,
+        dtb_data: bytes,
+        initrd_fd: int | None = None,
+    ) -> BootInfo:
+        """
+        Load boot components into guest memory where plan() put them.
+
+        The kernel and initramfs are read from their files straight into
+        guest memory rather than into bytes objects first.
+
+        Args:
+            plan: Load addresses from plan()
+            dtb_data: DTB blob bytes
+            initrd_fd: Open file descriptor of the initramfs (optional,
+                       used instead of opening plan.initrd_path)
+
+        Returns:
+            BootInfo with addresses of loaded components
+
+        Raises:
+            ValueError: If the plan has an initramfs but neither a path to
+                        it nor initrd_fd says where to read it from
+        """
+        if plan.initrd_size > 0 and plan.initrd_path is None and initrd_fd is None:
+            raise ValueError(
+                f"Plan has a {plan.initrd_size}-byte initramfs but no initrd_path, "
+                "and no initrd_fd was given"
+            )
+
+        with open(plan.kernel_path, "rb") as f:
+            self._memory.load_fd(plan.kernel_addr, f.fileno(), plan.kernel_size)
+        _log.debug("Loaded kernel at 0x%08x (%d bytes)", plan.kernel_addr, plan.kernel_size)
+
+        if plan.initrd_size > 0:
+            if initrd_fd is not None:
+                self._memory.load_fd(plan.initrd_addr, initrd_fd, plan.initrd_size)
+            else:
+                with open(plan.initrd_path, "rb") as f:
+                    self._memory.load_fd(plan.initrd_addr, f.fileno(), plan.initrd_size)
+
+            # Debug: verify initramfs was loaded correctly.
+            # The readback is only worth doing if someone will see it.
+            if _log.isEnabledFor(logging.DEBUG):
+                readback = self._memory.read(plan.initrd_addr, 16)
+                _log.debug(
+                    "Loaded initramfs at 0x%08x (%d bytes)", plan.initrd_addr, plan.initrd_size
+                )
+                _log.debug("  First 8 bytes: %s", readback[:8].hex(" "))
+                if readback[:2] == b'\x1f\x8b':
+                    _log.debug("  Format: gzip compressed")
+                elif readback[:6] == b'070701':
+                    _log.debug("  Format: cpio newc (uncompressed)")
+                else:
+                    _log.debug("  Format: unknown (expected 1f 8b for gzip or 070701 for cpio)")
+
+        self._memory.write(plan.dtb_addr, dtb_data)
+        _log.debug("Loaded DTB at 0x%08x (%d bytes)", plan.dtb_addr, len(dtb_data))
+
+        return BootInfo(
+            kernel_addr=plan.kernel_addr,
+            kernel_size=plan.kernel_size,
+            initrd_addr=plan.initrd_addr,
+            initrd_size=plan.initrd_size,
+            dtb_addr=plan.dtb_addr,
             dtb_size=len(dtb_data),
         )
 
-        # Final verification: check that memory at initrd_addr contains expected data
-        if initrd_size > 0:
-            verify_bytes = self._memory.read(boot_info.initrd_addr, 16)
-            print(f"Verification: memory at 0x{boot_info.initrd_addr:08x} = "
-                  f"{' '.join(f'{b:02x}' for b in verify_bytes[:8])}")
+    def load(
+        self,
+        kernel_path: str | Path,
+        initrd_path: str | Path | None = None,
+        dtb_data: bytes | None = None,
+        initrd_fd: int | None = None,
+        initrd_size: int | None = None,
+    ) -> BootInfo:
+        """
+        Plan and load boot components into guest memory in one step.
+
+        This is plan() followed by execute(), for callers whose DTB
+        doesn't depend on the load addresses.
 
-        return boot_info
+        The initramfs can be given as a path, or as a file descriptor the
+        caller already opened, so it isn't opened and stat'ed a second
+        time.
+
+        Args:
+            kernel_path: Path to kernel Image file
+            initrd_path: Path to initramfs (optional)
+            dtb_data: DTB blob bytes (required)
+            initrd_fd: Open file descriptor of the initramfs (optional,
+                       used instead of initrd_path)
+            initrd_size: Size of the initramfs behind initrd_fd, if the
+                         caller already knows it
+
+        Returns:
+            BootInfo with addresses of loaded components
+
+        Raises:
+            ValueError: If dtb_data is not provided
+        """
+        if dtb_data is None:
+            raise ValueError("DTB data is required")
+
+        if initrd_fd is not None and initrd_size is None:
+            initrd_size = os.fstat(initrd_fd).st_size
+
+        plan = self.plan(kernel_path, initrd_path, initrd_size)
+        return self.execute(plan, dtb_data, initrd_fd=initrd_fd)
 
     def setup_vcpu(self, vcpu, boot_info: BootInfo) -> None:
         """
@@ -181,17 +311,6 @@ class BootLoader:
             vcpu: The VCPU to configure
             boot_info: Boot information from load()
         """
-        # x0 = DTB address (Linux boot protocol)
-        vcpu.set_register(registers.X0, boot_info.dtb_addr)
-
-        # x1, x2, x3 = 0 (reserved for future use)
-        vcpu.set_register(registers.X1, 0)
-        vcpu.set_register(registers.X2, 0)
-        vcpu.set_register(registers.X3, 0)
-
-        # PC = kernel entry point
-        vcpu.set_pc(boot_info.kernel_addr)
-
         # PSTATE = EL1h with all interrupts masked
         # This is required by the ARM64 Linux boot protocol
         pstate = (
@@ -201,21 +320,35 @@ class BootLoader:
             | registers.PSTATE_I  # Mask IRQ
             | registers.PSTATE_F  # Mask FIQ
         )
-        vcpu.set_pstate(pstate)
 
         # Set up VBAR_EL1 and SP for early exception handling.
         # The kernel will update these later, but having valid values
         # helps if an exception occurs very early.
         vectors_phys = boot_info.kernel_addr + 0x10800
-        vcpu.set_register(registers.VBAR_EL1, vectors_phys)
 
-        stack_phys = boot_info.dtb_addr + boot_info.dtb_size
-        stack_phys = (stack_phys + 0xFFF) & ~0xFFF  # Page align
+        stack_phys = _page_align(boot_info.dtb_addr + boot_info.dtb_size)
         stack_phys += 0x10000  # Add 64KB for stack
-        vcpu.set_sp(stack_phys)
 
-        print(
-            f"vCPU configured: PC=0x{boot_info.kernel_addr:08x}, "
-            f"x0(DTB)=0x{boot_info.dtb_addr:08x}, "
-            f"VBAR=0x{vectors_phys:08x}, SP=0x{stack_phys:08x}"
+        vcpu.set_registers(
+            {
+                # x0 = DTB address (Linux boot protocol)
+                registers.X0: boot_info.dtb_addr,
+                # x1, x2, x3 = 0 (reserved for future use)
+                registers.X1: 0,
+                registers.X2: 0,
+                registers.X3: 0,
+                # PC = kernel entry point
+                registers.PC: boot_info.kernel_addr,
+                registers.PSTATE: pstate,
+                registers.VBAR_EL1: vectors_phys,
+                registers.SP: stack_phys,
+            }
+        )
+
+        _log.debug(
+            "vCPU configured: PC=0x%08x, x0(DTB)=0x%08x, VBAR=0x%08x, SP=0x%08x",
+            boot_info.kernel_addr,
+            boot_info.dtb_addr,
+            vectors_phys,
+            stack_phys,
         )
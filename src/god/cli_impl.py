@@ -0,0 +1,447 @@
+"""
+Implementations of the god CLI commands.
+
+god.cli only imports this module once it has matched a command, so
+commands are free to import whatever they need at the top of their body.
+"""
+
+import sys
+
+# Rules used to frame command output
+_RULE = "=" * 60
+_THIN_RULE = "-" * 60
+_STEP_RULE = "-" * 40
+
+
+def _banner(title: str) -> None:
+    """Print a title framed by rules above and below."""
+    print(_RULE)
+    print(title)
+    print(_RULE)
+
+
+def kvm_info(quiet: bool) -> None:
+    """
+    Display KVM system information.
+
+    Shows the KVM API version, vCPU mmap size, and all supported capabilities.
+    This is useful for verifying that KVM is working correctly and understanding
+    what features are available on this system.
+
+    With --quiet, nothing is queried or printed unless there's an error, so
+    scripts can use the exit status alone as a health check.
+    """
+    from god.kvm.system import KVMError, KVMSystem
+
+    try:
+        with KVMSystem() as kvm:
+            if quiet:
+                return
+
+            from god.kvm.capabilities import format_capabilities, query_capabilities
+
+            print("KVM System Information")
+            print(_RULE)
+            print()
+            print("Device:            /dev/kvm")
+            print(f"API Version:       {kvm.api_version} (expected: 12)")
+            print(f"vCPU mmap size:    {kvm.get_vcpu_mmap_size()} bytes")
+            print()
+            print("Capabilities:")
+            print(_THIN_RULE)
+            capabilities = query_capabilities(kvm)
+            print(format_capabilities(capabilities))
+            print()
+            print("KVM is ready!")
+
+    except KVMError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1) from e
+
+
+def test_vm(ram_mb: int) -> None:
+    """
+    Test VM creation and memory setup.
+
+    Creates a VM, allocates memory, writes some data, reads it back,
+    and verifies everything works.
+    """
+    from god.kvm.system import KVMSystem, KVMError
+    from god.vm.vm import VirtualMachine, VMError
+    from god.vm.memory import MemoryError
+
+    ram_bytes = ram_mb * 1024 * 1024
+
+    print(f"Creating VM with {ram_mb} MB RAM...")
+    print()
+
+    try:
+        with KVMSystem() as kvm:
+            with VirtualMachine(kvm, ram_size=ram_bytes) as vm:
+                print(f"VM created: {vm}")
+                print()
+                print("Memory slots:")
+                for slot in vm.memory.slots:
+                    print(f"  {slot}")
+                print()
+
+                # Write some data to memory
+                test_address = vm.ram_base
+                test_data = b"Hello from the VMM!"
+
+                print(f"Writing test data to 0x{test_address:08x}...")
+                vm.memory.write(test_address, test_data)
+
+                # Read it back
+                print(f"Reading back from 0x{test_address:08x}...")
+                read_back = vm.memory.read(test_address, len(test_data))
+
+                if read_back == test_data:
+                    print(f"Success! Read: {read_back}")
+                else:
+                    print(f"MISMATCH! Wrote: {test_data}, Read: {read_back}")
+                    raise SystemExit(1)
+
+                print()
+                print("VM test passed!")
+
+    except (KVMError, VMError, MemoryError) as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+
+
+def build_kernel(version: str, work_dir: str, configure_only: bool) -> None:
+    """
+    Download and build the Linux kernel.
+
+    Downloads the specified kernel version, configures it for our VMM,
+    and builds the Image file.
+    """
+    from god.build import KernelBuilder
+
+    builder = KernelBuilder(work_dir)
+    builder.download(version)
+    builder.configure(minimal=True)
+
+    if not configure_only:
+        image_path = builder.build()
+        print(f"\nKernel built successfully: {image_path}")
+
+
+def build_kernel_clean(work_dir: str, full: bool) -> None:
+    """
+    Clean kernel build artifacts.
+
+    Use --full for mrproper (needed if build is corrupted).
+    """
+    from god.build import KernelBuilder
+
+    builder = KernelBuilder(work_dir)
+    if full:
+        builder.mrproper()
+    else:
+        builder.clean()
+
+
+def build_busybox(version: str, work_dir: str) -> None:
+    """
+    Download and build BusyBox.
+
+    Downloads the specified BusyBox version and builds it with static linking.
+    """
+    from god.build import BusyBoxBuilder
+
+    builder = BusyBoxBuilder(work_dir)
+    builder.download(version)
+    builder.configure()
+    binary_path = builder.build()
+    print(f"\nBusyBox built successfully: {binary_path}")
+
+
+def build_initramfs(busybox: str | None, work_dir: str, compress: bool) -> None:
+    """
+    Create an initramfs image.
+
+    Creates a minimal initramfs with BusyBox. If no BusyBox path is provided,
+    uses the one in the build directory.
+    """
+    from pathlib import Path
+
+    from god.build import InitramfsBuilder
+
+    builder = InitramfsBuilder(work_dir)
+
+    # Find BusyBox
+    if busybox:
+        busybox_path = Path(busybox)
+    else:
+        busybox_path = Path(work_dir) / "busybox" / "busybox"
+        if not busybox_path.exists():
+            print(f"BusyBox not found at {busybox_path}")
+            print("Run 'god build busybox' first or specify --busybox path")
+            raise SystemExit(1)
+
+    builder.create_structure()
+    builder.install_busybox(busybox_path)
+    builder.create_init()
+    cpio_path = builder.pack(compress=compress)
+    print(f"\nInitramfs created: {cpio_path}")
+
+
+def build_all(work_dir: str) -> None:
+    """
+    Build everything needed to boot Linux.
+
+    Downloads and builds the kernel, BusyBox, and creates an initramfs.
+    """
+    from god.build import BusyBoxBuilder, InitramfsBuilder, KernelBuilder
+
+    _banner("Building all components")
+    print()
+
+    # Build kernel
+    print("Step 1: Building Linux kernel")
+    print(_STEP_RULE)
+    kernel_builder = KernelBuilder(work_dir)
+    kernel_builder.download()
+    kernel_builder.configure()
+    kernel_path = kernel_builder.build()
+    print()
+
+    # Build BusyBox
+    print("Step 2: Building BusyBox")
+    print(_STEP_RULE)
+    busybox_builder = BusyBoxBuilder(work_dir)
+    busybox_builder.download()
+    busybox_builder.configure()
+    busybox_path = busybox_builder.build()
+    print()
+
+    # Create initramfs
+    print("Step 3: Creating initramfs")
+    print(_STEP_RULE)
+    initramfs_builder = InitramfsBuilder(work_dir)
+    initramfs_builder.create_structure()
+    initramfs_builder.install_busybox(busybox_path)
+    initramfs_builder.create_init()
+    cpio_path = initramfs_builder.pack()
+    print()
+
+    _banner("Build complete!")
+    print()
+    print(f"Kernel:    {kernel_path}")
+    print(f"Initramfs: {cpio_path}")
+    print()
+    print("To boot Linux:")
+    print(f"  god boot {kernel_path} --initrd {cpio_path}")
+
+
+def boot_linux(
+    kernel: str,
+    initrd: str | None,
+    cmdline: str,
+    ram_mb: int,
+    dtb: str | None,
+    debug: bool,
+    interactive: bool,
+) -> None:
+    """
+    Boot a Linux kernel.
+
+    Loads the kernel and optional initramfs into the VM and starts execution.
+    A Device Tree is generated automatically unless a custom one is provided.
+
+    By default, interactive mode is enabled, allowing you to type commands
+    in the guest shell. Use --no-interactive for non-interactive boot.
+
+    Examples:
+        god boot Image --initrd initramfs.cpio
+        god boot Image -i rootfs.cpio.gz -c "console=ttyAMA0 debug"
+        god boot Image --dtb custom.dtb --ram 2048 --no-interactive
+    """
+    import logging
+    import os
+
+    from god.boot import BootLoader, DeviceTreeGenerator, DTBConfig, KernelError
+    from god.devices import DeviceRegistry, PL011UART
+    from god.kvm.system import KVMError, KVMSystem
+    from god.vcpu.runner import RunnerError, VMRunner
+    from god.vm.vm import VirtualMachine, VMError
+
+    if debug:
+        logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
+    ram_bytes = ram_mb * 1024 * 1024
+
+    print(f"Booting Linux with {ram_mb} MB RAM")
+    print(f"Kernel: {kernel}")
+    if initrd:
+        print(f"Initrd: {initrd}")
+    print(f"Command line: {cmdline}")
+    print()
+
+    initrd_fd = None
+    initrd_size = 0
+    try:
+        # Open the initramfs once: its size goes into the DTB, and the
+        # loader reads it from the same descriptor
+        if initrd:
+            initrd_fd = os.open(initrd, os.O_RDONLY)
+            initrd_size = os.fstat(initrd_fd).st_size
+
+        with KVMSystem() as kvm:
+            with VirtualMachine(kvm, ram_size=ram_bytes) as vm:
+                # Set up devices
+                devices = DeviceRegistry.from_devices((PL011UART(),))
+
+                # Create runner (sets up GIC)
+                runner = VMRunner(vm, kvm, devices)
+                vcpu = runner.create_vcpu()
+
+                # Create boot loader
+                loader = BootLoader(vm.memory, ram_bytes)
+
+                # Work out where everything goes before loading anything,
+                # so the generated DTB describes exactly what gets loaded
+                plan = loader.plan(kernel, initrd_path=initrd, initrd_size=initrd_size)
+
+                # Generate or load DTB
+                if dtb:
+                    # Use provided DTB
+                    with open(dtb, "rb") as f:
+                        dtb_data = f.read()
+                    print(f"Using custom DTB: {dtb}")
+                else:
+                    dtb_config = DTBConfig(
+                        ram_size=ram_bytes,
+                        cmdline=cmdline,
+                        initrd_start=plan.initrd_addr,
+                        initrd_end=plan.initrd_end,
+                    )
+                    dtb_data = DeviceTreeGenerator().generate(dtb_config)
+                    print("Generated Device Tree")
+                    if initrd:
+                        print(f"  DTB initrd_start=0x{plan.initrd_addr:08x}")
+                        print(f"  DTB initrd_end=0x{plan.initrd_end:08x}")
+
+                # Load everything
+                boot_info = loader.execute(plan, dtb_data, initrd_fd=initrd_fd)
+
+                # Set up vCPU for boot
+                loader.setup_vcpu(vcpu, boot_info)
+
+                print()
+                _banner("Starting Linux...")
+                print()
+                # The UART writes guest output to stdout's binary layer, so
+                # push our text out first
+                sys.stdout.flush()
+
+                # Run!
+                stats = runner.run(max_exits=10_000_000, quiet=not debug, interactive=interactive)
+
+                print()
+                print(_RULE)
+                if stats.get("hlt"):
+                    print("VM halted")
+                else:
+                    print(f"VM stopped: {stats.get('exit_reason')}")
+                print(f"Total exits: {stats.get('exits')}")
+
+    except (KVMError, VMError, RunnerError, KernelError) as e:
+        print(f"\nError: {e}")
+        raise SystemExit(1)
+    except FileNotFoundError as e:
+        print(f"\nFile not found: {e}")
+        raise SystemExit(1)
+    finally:
+        if initrd_fd is not None:
+            os.close(initrd_fd)
+
+
+def run_binary(binary: str, entry: str, ram_mb: int, with_uart: bool) -> None:
+    """
+    Run a binary in the VM.
+
+    Loads the binary at the entry point address and runs until it halts.
+    By default, the PL011 UART is enabled so guest code can print output.
+
+    Example:
+        god run tests/guest_code/hello.bin
+        god run my_kernel.bin --entry 0x40000000 --ram 128
+    """
+    from god.kvm.system import KVMSystem, KVMError
+    from god.vm.vm import VirtualMachine, VMError
+    from god.vcpu.runner import VMRunner, RunnerError
+    from god.vcpu import registers
+    from god.devices import DeviceRegistry, PL011UART
+
+    # Parse entry point (hex with 0x prefix, or decimal; base 0 also
+    # accepts 0X, 0o and 0b prefixes). Base 0 rejects decimals with a
+    # leading zero like 0400, so those are read as plain decimal.
+    try:
+        try:
+            entry_point = int(entry, 0)
+        except ValueError:
+            entry_point = int(entry, 10)
+    except ValueError:
+        print(f"god run: error: invalid entry point: {entry!r}", file=sys.stderr)
+        raise SystemExit(2) from None
+
+    ram_bytes = ram_mb * 1024 * 1024
+
+    print(f"Creating VM with {ram_mb} MB RAM...")
+
+    try:
+        with KVMSystem() as kvm:
+            with VirtualMachine(kvm, ram_size=ram_bytes) as vm:
+                # Set up device registry
+                devices = DeviceRegistry.from_devices((PL011UART(),) if with_uart else ())
+
+                runner = VMRunner(vm, kvm, devices)
+                vcpu = runner.create_vcpu()
+
+                # Set initial register state
+                # PC = entry point (where code starts)
+                vcpu.set_pc(entry_point)
+
+                # SP = top of RAM (stack grows down)
+                stack_top = vm.ram_base + vm.ram_size
+                vcpu.set_sp(stack_top)
+
+                # PSTATE = EL1h with all interrupts masked
+                # EL1h means: Exception Level 1, using SP_EL1
+                # This is "kernel mode" on ARM64
+                pstate = (
+                    registers.PSTATE_MODE_EL1H |  # Exception Level 1, SP_EL1
+                    registers.PSTATE_A |           # Mask async aborts
+                    registers.PSTATE_I |           # Mask IRQs
+                    registers.PSTATE_F             # Mask FIQs
+                )
+                vcpu.set_pstate(pstate)
+
+                print(f"PC = 0x{entry_point:016x}")
+                print(f"SP = 0x{stack_top:016x}")
+                print()
+
+                # Load the binary
+                runner.load_binary(binary, entry_point)
+
+                # Run!
+                print(_RULE)
+                print("Guest output:")
+                print(_THIN_RULE)
+                # The UART writes guest output to stdout's binary layer, so
+                # push our text out first
+                sys.stdout.flush()
+
+                stats = runner.run(quiet=True)
+
+                print(_THIN_RULE)
+                print()
+                print(f"Guest {'halted' if stats['hlt'] else 'stopped'} "
+                      f"after {stats['exits']} exits")
+
+    except (KVMError, VMError, RunnerError) as e:
+        print(f"\nError: {e}")
+        raise SystemExit(1)
@@ -12,11 +12,22 @@ The GIC and timer are special—they're in-kernel devices that we configure
 but don't emulate ourselves. KVM handles the actual emulation.
 """
 
+import importlib
+
 from .device import Device, MMIOAccess, MMIOResult
 from .registry import DeviceRegistry
-from .uart import PL011UART
-from .gic import GIC, GICError
-from .timer import Timer, TIMER_PPI_VIRTUAL, TIMER_PPI_NONSECURE_PHYS
+
+# The device modules pull in the KVM bindings (and with them cffi), so they
+# are only imported when one of their names is first used (PEP 562). Code
+# that just needs the MMIO infrastructure doesn't pay for them.
+_LAZY = {
+    "PL011UART": ".uart",
+    "GIC": ".gic",
+    "GICError": ".gic",
+    "Timer": ".timer",
+    "TIMER_PPI_VIRTUAL": ".timer",
+    "TIMER_PPI_NONSECURE_PHYS": ".timer",
+}
 
 __all__ = [
     # MMIO device infrastructure
@@ -33,3 +44,18 @@ __all__ = [
     "TIMER_PPI_VIRTUAL",
     "TIMER_PPI_NONSECURE_PHYS",
 ]
+
+
+def __getattr__(name: str):
+    try:
+        module = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module, __name__), name)
+    # Cache it so later lookups don't come back through here
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return __all__
@@ -4,11 +4,10 @@ Base class for emulated devices.
 All devices that handle MMIO accesses should inherit from this class.
 """
 
-from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class MMIOAccess:
     """
     Describes an MMIO access from the guest.
@@ -28,11 +27,14 @@ class MMIOAccess:
     data: int = 0
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MMIOResult:
     """
     Result of handling an MMIO access.
 
+    Results are immutable, so a common one (like a handled write) can be
+    shared instead of allocating a new object on every MMIO exit.
+
     Attributes:
         data: For reads, the data to return to the guest (as int)
         handled: Whether the access was handled by a device
@@ -41,7 +43,7 @@ class MMIOResult:
     handled: bool = True
 
 
-class Device(ABC):
+class Device:
     """
     Base class for all emulated devices.
 
@@ -56,6 +58,16 @@ class Device(ABC):
     - read(): Handle read accesses
     - write(): Handle write accesses
 
+    These raise NotImplementedError until overridden. Device is a plain
+    class rather than an ABC, so creating and type-checking devices
+    doesn't go through ABCMeta.
+
+    Subclasses that define __init__ must call super().__init__() once
+    base_address and size return their final values. The region is read
+    once there and cached in plain attributes, because contains() and
+    offset() run on every MMIO exit and going through the properties each
+    time would cost a Python call per access.
+
     Example:
         class MyDevice(Device):
             @property
@@ -79,27 +91,32 @@ class Device(ABC):
                 pass
     """
 
+    # Subclasses can declare __slots__ of their own and stay dict-free
+    __slots__ = ("_base", "_size", "_end")
+
+    def __init__(self):
+        self._base = self.base_address
+        self._size = self.size
+        self._end = self._base + self._size
+
     @property
-    @abstractmethod
     def name(self) -> str:
         """Human-readable device name for debugging."""
-        pass
+        raise NotImplementedError
 
     @property
-    @abstractmethod
     def base_address(self) -> int:
         """Base address in guest physical memory."""
-        pass
+        raise NotImplementedError
 
     @property
-    @abstractmethod
     def size(self) -> int:
         """Size of the device's MMIO region in bytes."""
-        pass
+        raise NotImplementedError
 
     def contains(self, address: int) -> bool:
         """Check if a guest physical address falls within this device's region."""
-        return self.base_address <= address < self.base_address + self.size
+        return self._base <= address < self._end
 
     def offset(self, address: int) -> int:
         """
@@ -108,9 +125,8 @@ class Device(ABC):
         For example, if base_address is 0x09000000 and address is 0x09000018,
         this returns 0x18.
         """
-        return address - self.base_address
+        return address - self._base
 
-    @abstractmethod
     def read(self, offset: int, size: int) -> int:
         """
         Handle a read from the device.
@@ -122,9 +138,8 @@ class Device(ABC):
         Returns:
             The value to return to the guest.
         """
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def write(self, offset: int, size: int, value: int):
         """
         Handle a write to the device.
@@ -134,7 +149,7 @@ class Device(ABC):
             size: Write size in bytes (1, 2, 4, or 8)
             value: The value being written
         """
-        pass
+        raise NotImplementedError
 
     def reset(self):
         """
@@ -19,7 +19,12 @@ GICv3 Components:
 - CPU Interface: System registers (ICC_*) accessed by the guest
 """
 
-from god.kvm.bindings import ffi, lib, get_errno
+import errno
+import logging
+import os
+import weakref
+
+from god.kvm.bindings import ffi, get_errno, ioctl_ptr
 from god.kvm.constants import (
     KVM_CREATE_DEVICE,
     KVM_SET_DEVICE_ATTR,
@@ -33,6 +38,18 @@ from god.kvm.constants import (
 )
 from god.vm.layout import GIC_DISTRIBUTOR, GIC_REDISTRIBUTOR
 
+_log = logging.getLogger(__name__)
+
+# ARM KVM_IRQ_LINE uses a specific bit encoding:
+#   bits 31-24: irq_type (0=SPI via routing, 1=SPI via GIC, 2=PPI)
+#   bits 23-16: vcpu_index (ignored for SPIs)
+#   bits 15-0:  irq_id (the actual interrupt number)
+#
+# These are the irq_type values already shifted into place, so encoding an
+# interrupt is a single OR with its number.
+_SPI_MASK = 1 << 24  # KVM_ARM_IRQ_TYPE_SPI
+_PPI_MASK = 2 << 24  # KVM_ARM_IRQ_TYPE_PPI
+
 
 class GICError(Exception):
     """Exception raised when GIC operations fail."""
@@ -83,9 +100,24 @@ class GIC:
         self._vm_fd = vm_fd
         self._num_cpus = num_cpus
         self._fd = -1  # GIC device file descriptor (set by create())
+        # Closes _fd if close() is never called (set by create())
+        self._finalizer: weakref.finalize | None = None
         self._created = False
         self._finalized = False
 
+        # inject_irq() runs for every interrupt a device raises or lowers,
+        # so it reuses one kvm_irq_level struct and remembers each IRQ's
+        # KVM_IRQ_LINE encoding instead of redoing both every call
+        self._irq_level = ffi.new("struct kvm_irq_level *")
+        self._encoded_irqs: dict[int, int] = {}
+
+        # Scratch space for KVM_SET_DEVICE_ATTR, shared by the two address
+        # writes in create() and the init in finalize(). The ioctl copies
+        # what it needs before returning, so one struct and one value
+        # buffer are enough for all of them.
+        self._attr = ffi.new("struct kvm_device_attr *")
+        self._attr_value = ffi.new("uint64_t *")
+
     def create(self) -> None:
         """
         Create the GIC device and set its addresses.
@@ -114,8 +146,11 @@ class GIC:
         self._set_redistributor_address(GIC_REDISTRIBUTOR.base)
 
         self._created = True
-        print(f"GIC created: Distributor @ 0x{GIC_DISTRIBUTOR.base:08x}, "
-              f"Redistributor @ 0x{GIC_REDISTRIBUTOR.base:08x}")
+        _log.info(
+            "GIC created: Distributor @ 0x%08x, Redistributor @ 0x%08x",
+            GIC_DISTRIBUTOR.base,
+            GIC_REDISTRIBUTOR.base,
+        )
 
     def finalize(self) -> None:
         """
@@ -140,7 +175,7 @@ class GIC:
         self._init_device()
 
         self._finalized = True
-        print("GIC finalized")
+        _log.info("GIC finalized")
 
     def _create_device(self) -> None:
         """Create the in-kernel GIC device."""
@@ -151,19 +186,25 @@ class GIC:
         device.flags = 0   # No special flags
 
         # Ask KVM to create the device
-        result = lib.ioctl(self._vm_fd, KVM_CREATE_DEVICE, device)
+        result = ioctl_ptr(self._vm_fd, KVM_CREATE_DEVICE, device)
         if result < 0:
-            errno = get_errno()
-            if errno == 19:  # ENODEV - device type not supported
+            err = get_errno()
+            if err == errno.ENODEV:  # Device type not supported
                 raise GICError(
                     "GICv3 not supported. Is this an ARM64 system with KVM?"
                 )
-            raise GICError(f"Failed to create GIC device: errno {errno}")
+            raise GICError(f"Failed to create GIC device: errno {err}")
 
         # Save the device file descriptor
         # We'll use this for all subsequent GIC configuration
         self._fd = device.fd
 
+        # Close the fd when this object is garbage collected or at exit,
+        # in case close() is never called. Unlike __del__, a finalizer
+        # runs before interpreter shutdown tears modules down, and it only
+        # holds the fd number, not the GIC.
+        self._finalizer = weakref.finalize(self, os.close, self._fd)
+
     def _set_distributor_address(self, address: int) -> None:
         """
         Set the Distributor base address.
@@ -201,20 +242,20 @@ class GIC:
             addr_type: KVM_VGIC_V3_ADDR_TYPE_DIST or KVM_VGIC_V3_ADDR_TYPE_REDIST
             address: The guest physical address to set.
         """
-        # Create a pointer to hold the address value
+        # Store the address value where KVM can read it
         # The API wants a pointer, not the value directly
-        addr_ptr = ffi.new("uint64_t *")
+        addr_ptr = self._attr_value
         addr_ptr[0] = address
 
         # Set up the attribute structure
-        attr = ffi.new("struct kvm_device_attr *")
+        attr = self._attr
         attr.flags = 0
         attr.group = KVM_DEV_ARM_VGIC_GRP_ADDR  # "I'm setting an address"
         attr.attr = addr_type                    # "Specifically, this component"
         attr.addr = int(ffi.cast("uintptr_t", addr_ptr))  # "Here's the value"
 
         # Tell the kernel
-        result = lib.ioctl(self._fd, KVM_SET_DEVICE_ATTR, attr)
+        result = ioctl_ptr(self._fd, KVM_SET_DEVICE_ATTR, attr)
         if result < 0:
             component = "Distributor" if addr_type == KVM_VGIC_V3_ADDR_TYPE_DIST else "Redistributor"
             raise GICError(
@@ -229,13 +270,13 @@ class GIC:
         This tells KVM: "I'm done configuring, finalize the GIC."
         After this call, the GIC is ready to route interrupts.
         """
-        attr = ffi.new("struct kvm_device_attr *")
+        attr = self._attr
         attr.flags = 0
         attr.group = KVM_DEV_ARM_VGIC_GRP_CTRL  # "Control operation"
         attr.attr = KVM_DEV_ARM_VGIC_CTRL_INIT  # "Initialize"
         attr.addr = 0  # No value needed for init
 
-        result = lib.ioctl(self._fd, KVM_SET_DEVICE_ATTR, attr)
+        result = ioctl_ptr(self._fd, KVM_SET_DEVICE_ATTR, attr)
         if result < 0:
             raise GICError(f"Failed to initialize GIC: errno {get_errno()}")
 
@@ -271,31 +312,26 @@ class GIC:
         if not self._finalized:
             raise GICError("GIC not finalized - call finalize() first")
 
-        # ARM KVM_IRQ_LINE uses a specific bit encoding:
-        #   bits 31-24: irq_type (0=SPI via routing, 1=SPI via GIC, 2=PPI)
-        #   bits 23-16: vcpu_index (ignored for SPIs)
-        #   bits 15-0:  irq_id (the actual interrupt number)
-        #
-        # For SPIs (irq >= 32): irq_type=1, irq_id=irq
-        # For PPIs (16-31): irq_type=2, irq_id=irq, vcpu_index matters
-        KVM_ARM_IRQ_TYPE_SPI = 1
-        KVM_ARM_IRQ_TYPE_PPI = 2
-
-        if irq >= 32:
-            # SPI - Shared Peripheral Interrupt
-            encoded_irq = (KVM_ARM_IRQ_TYPE_SPI << 24) | irq
-        elif irq >= 16:
-            # PPI - Private Peripheral Interrupt (per-CPU)
-            encoded_irq = (KVM_ARM_IRQ_TYPE_PPI << 24) | irq
-        else:
-            # SGI - not typically used via KVM_IRQ_LINE
-            encoded_irq = irq
-
-        irq_level = ffi.new("struct kvm_irq_level *")
+        encoded_irq = self._encoded_irqs.get(irq)
+        if encoded_irq is None:
+            # For SPIs (irq >= 32): irq_type=1, irq_id=irq
+            # For PPIs (16-31): irq_type=2, irq_id=irq, vcpu_index matters
+            if irq >= 32:
+                # SPI - Shared Peripheral Interrupt
+                encoded_irq = _SPI_MASK | irq
+            elif irq >= 16:
+                # PPI - Private Peripheral Interrupt (per-CPU)
+                encoded_irq = _PPI_MASK | irq
+            else:
+                # SGI - not typically used via KVM_IRQ_LINE
+                encoded_irq = irq
+            self._encoded_irqs[irq] = encoded_irq
+
+        irq_level = self._irq_level
         irq_level.irq = encoded_irq
         irq_level.level = 1 if level else 0
 
-        result = lib.ioctl(self._vm_fd, KVM_IRQ_LINE, irq_level)
+        result = ioctl_ptr(self._vm_fd, KVM_IRQ_LINE, irq_level)
         if result < 0:
             action = "assert" if level else "deassert"
             raise GICError(f"Failed to {action} IRQ {irq} (encoded 0x{encoded_irq:08x}): errno {get_errno()}")
@@ -317,8 +353,11 @@ class GIC:
 
     def close(self) -> None:
         """Close the GIC device file descriptor."""
-        if self._fd >= 0:
-            lib.close(self._fd)
+        if self._finalizer is not None:
+            # Calling the finalizer closes the fd and detaches it, so it
+            # won't run again
+            self._finalizer()
+            self._finalizer = None
             self._fd = -1
             self._created = False
             self._finalized = False
@@ -6,8 +6,21 @@ When we get a KVM_EXIT_MMIO, we look up which device handles that
 address and dispatch to it.
 """
 
+import bisect
+import logging
+from collections.abc import Callable, Iterable
+
 from .device import Device, MMIOAccess, MMIOResult
 
+_log = logging.getLogger(__name__)
+
+# Result of every handled write: there is nothing to return to the guest
+_HANDLED_WRITE = MMIOResult(data=0, handled=True)
+# Result of every access no device claims: reads see zeros
+_UNHANDLED = MMIOResult(data=0, handled=False)
+# After the first unhandled access, only every Nth one is reported
+_UNHANDLED_WARN_EVERY = 1024
+
 
 class DeviceRegistry:
     """
@@ -17,17 +30,63 @@ class DeviceRegistry:
     KVM_EXIT_MMIO, it calls handle_mmio() which finds the right device
     and dispatches to it.
 
+    Every MMIO exit does a lookup, so besides the devices in registration
+    order we keep them sorted by base address, with their bases in a
+    parallel list. Device regions never overlap, so the only candidate
+    for an address is the last device starting at or below it, which a
+    binary search finds in O(log n). The region ends and the devices'
+    bound read()/write() methods are kept in more parallel lists, so
+    handle_mmio() dispatches with indexed loads instead of attribute
+    lookups on the device.
+
     Usage:
         registry = DeviceRegistry()
         registry.register(uart)
         registry.register(virtio_blk)
 
+        # Or, when the devices are known up front:
+        registry = DeviceRegistry.from_devices((uart, virtio_blk))
+
         # When we get KVM_EXIT_MMIO:
         result = registry.handle_mmio(access)
     """
 
     def __init__(self):
         self._devices: list[Device] = []
+        # Snapshot handed out by the devices property, rebuilt on register()
+        self._devices_tuple: tuple[Device, ...] = ()
+        # Sorted by base address; index i in each list describes the same
+        # device: _bases[i] is _sorted_devices[i]._base, _ends[i] its _end,
+        # and the handlers are its bound read() and write()
+        self._bases: list[int] = []
+        self._ends: list[int] = []
+        self._sorted_devices: list[Device] = []
+        self._read_handlers: list[Callable[[int, int], int]] = []
+        self._write_handlers: list[Callable[[int, int, int], None]] = []
+        # Unhandled accesses seen so far, at any address
+        self._unhandled_count = 0
+
+    @classmethod
+    def from_devices(cls, devices: Iterable[Device]) -> "DeviceRegistry":
+        """
+        Create a registry holding the given devices.
+
+        This is the same as calling register() for each device in order,
+        so overlapping devices are rejected the same way.
+
+        Args:
+            devices: The devices to register.
+
+        Returns:
+            The new registry.
+
+        Raises:
+            ValueError: If two of the devices' address ranges overlap.
+        """
+        registry = cls()
+        for device in devices:
+            registry.register(device)
+        return registry
 
     def register(self, device: Device):
         """
@@ -40,25 +99,32 @@ class DeviceRegistry:
             ValueError: If the device's address range overlaps with
                         an already-registered device.
         """
-        # Check for overlaps with existing devices
-        for existing in self._devices:
-            if self._overlaps(device, existing):
-                raise ValueError(
-                    f"Device {device.name} (0x{device.base_address:08x}-"
-                    f"0x{device.base_address + device.size:08x}) "
-                    f"overlaps with {existing.name} (0x{existing.base_address:08x}-"
-                    f"0x{existing.base_address + existing.size:08x})"
-                )
+        # Registered regions don't overlap, so the new device can only
+        # collide with its neighbours in sorted order: the device just
+        # below it and the one just above
+        index = bisect.bisect_right(self._bases, device._base)
+        if index > 0 and self._ends[index - 1] > device._base:
+            self._raise_overlap(device, self._sorted_devices[index - 1])
+        if index < len(self._bases) and device._end > self._bases[index]:
+            self._raise_overlap(device, self._sorted_devices[index])
 
         self._devices.append(device)
-        print(f"Registered device: {device.name} at 0x{device.base_address:08x}")
-
-    def _overlaps(self, a: Device, b: Device) -> bool:
-        """Check if two devices' address ranges overlap."""
-        a_end = a.base_address + a.size
-        b_end = b.base_address + b.size
-        # Two ranges overlap unless one ends before the other starts
-        return not (a_end <= b.base_address or b_end <= a.base_address)
+        self._devices_tuple = tuple(self._devices)
+        self._bases.insert(index, device._base)
+        self._ends.insert(index, device._end)
+        self._sorted_devices.insert(index, device)
+        self._read_handlers.insert(index, device.read)
+        self._write_handlers.insert(index, device.write)
+        _log.info("Registered device: %s at 0x%08x", device.name, device._base)
+
+    def _raise_overlap(self, device: Device, existing: Device):
+        """Report that device's address range overlaps existing's."""
+        raise ValueError(
+            f"Device {device.name} (0x{device.base_address:08x}-"
+            f"0x{device.base_address + device.size:08x}) "
+            f"overlaps with {existing.name} (0x{existing.base_address:08x}-"
+            f"0x{existing.base_address + existing.size:08x})"
+        )
 
     def find_device(self, address: int) -> Device | None:
         """
@@ -70,9 +136,11 @@ class DeviceRegistry:
         Returns:
             The device, or None if no device handles this address.
         """
-        for device in self._devices:
-            if device.contains(address):
-                return device
+        # The last device whose base is <= address is the only one that
+        # can contain it
+        index = bisect.bisect_right(self._bases, address) - 1
+        if index >= 0 and address < self._ends[index]:
+            return self._sorted_devices[index]
         return None
 
     def handle_mmio(self, access: MMIOAccess) -> MMIOResult:
@@ -86,32 +154,58 @@ class DeviceRegistry:
             The result of handling the access. If no device handles the
             address, returns data=0 and handled=False.
         """
-        device = self.find_device(access.address)
+        # Same lookup as find_device(), inlined: this runs on every MMIO
+        # exit, so values used more than once are held in locals
+        address = access.address
+        bases = self._bases
+        index = bisect.bisect_right(bases, address) - 1
 
-        if device is None:
-            # No device at this address - warn and return zeros
-            print(
-                f"Warning: Unhandled MMIO {'write' if access.is_write else 'read'} "
-                f"at 0x{access.address:08x}"
-            )
-            return MMIOResult(data=0, handled=False)
+        if index < 0 or address >= self._ends[index]:
+            self._warn_unhandled(access)
+            return _UNHANDLED
 
         # Calculate offset within the device
-        offset = device.offset(access.address)
+        offset = address - bases[index]
 
         if access.is_write:
-            device.write(offset, access.size, access.data)
-            return MMIOResult(handled=True)
+            self._write_handlers[index](offset, access.size, access.data)
+            return _HANDLED_WRITE
         else:
-            value = device.read(offset, access.size)
+            value = self._read_handlers[index](offset, access.size)
             return MMIOResult(data=value, handled=True)
 
+    def _warn_unhandled(self, access: MMIOAccess):
+        """
+        Warn about an access no device claims, rate-limited.
+
+        A confused guest can hit an unmapped address in a tight loop, or
+        sweep through unmapped space, and even with no logging configured
+        every warning is formatted and written to stderr. So we warn on
+        the first unhandled access, then once every _UNHANDLED_WARN_EVERY
+        with a running count, whatever the addresses involved.
+        """
+        count = self._unhandled_count + 1
+        self._unhandled_count = count
+        if count == 1:
+            _log.warning(
+                "Unhandled MMIO %s at 0x%08x",
+                "write" if access.is_write else "read",
+                access.address,
+            )
+        elif count % _UNHANDLED_WARN_EVERY == 0:
+            _log.warning(
+                "Unhandled MMIO %s at 0x%08x (%d unhandled accesses so far)",
+                "write" if access.is_write else "read",
+                access.address,
+                count,
+            )
+
     def reset_all(self):
         """Reset all registered devices to their initial state."""
         for device in self._devices:
             device.reset()
 
     @property
-    def devices(self) -> list[Device]:
-        """Get the list of registered devices (read-only)."""
-        return list(self._devices)
+    def devices(self) -> tuple[Device, ...]:
+        """Get the registered devices, in registration order (read-only)."""
+        return self._devices_tuple
@@ -52,6 +52,23 @@ class Timer:
         self.ppi_virtual = TIMER_PPI_VIRTUAL
         self.ppi_hypervisor = TIMER_PPI_HYPERVISOR
 
+        # The properties only depend on the PPI numbers above, so build
+        # them once here rather than on every get_device_tree_props()
+        def ppi_to_dt(ppi: int) -> tuple[int, int, int]:
+            # Convert raw PPI numbers to Device Tree format
+            return (1, ppi - _DT_PPI_OFFSET, 0x04)
+
+        self._dt_props = {
+            "compatible": "arm,armv8-timer",
+            "interrupts": [
+                *ppi_to_dt(self.ppi_secure_phys),      # Secure physical
+                *ppi_to_dt(self.ppi_nonsecure_phys),   # Non-secure physical
+                *ppi_to_dt(self.ppi_virtual),          # Virtual (Linux uses this)
+                *ppi_to_dt(self.ppi_hypervisor),       # Hypervisor
+            ],
+            "always-on": True,
+        }
+
     def get_device_tree_props(self) -> dict:
         """
         Get Device Tree properties for the timer node.
@@ -69,21 +86,11 @@ class Timer:
             type = 1 for PPI
             number = PPI number - 16 (Device Tree convention)
             flags = 0x04 for level-sensitive, active-low
-        """
-        # Convert raw PPI numbers to Device Tree format
-        def ppi_to_dt(ppi: int) -> tuple[int, int, int]:
-            return (1, ppi - _DT_PPI_OFFSET, 0x04)
 
-        return {
-            "compatible": "arm,armv8-timer",
-            "interrupts": [
-                *ppi_to_dt(self.ppi_secure_phys),      # Secure physical
-                *ppi_to_dt(self.ppi_nonsecure_phys),   # Non-secure physical
-                *ppi_to_dt(self.ppi_virtual),          # Virtual (Linux uses this)
-                *ppi_to_dt(self.ppi_hypervisor),       # Hypervisor
-            ],
-            "always-on": True,
-        }
+        The dict is a fresh copy, so callers may modify it.
+        """
+        props = self._dt_props
+        return {**props, "interrupts": list(props["interrupts"])}
 
     def __repr__(self) -> str:
         return (
@@ -13,7 +13,13 @@ We emulate:
 Reference: ARM PrimeCell UART (PL011) Technical Reference Manual
 """
 
+import atexit
+import os
 import sys
+import weakref
+from collections import deque
+from collections.abc import Callable
+from functools import partial
 from typing import TYPE_CHECKING, TextIO
 
 from god.vm.layout import UART
@@ -22,6 +28,31 @@ from .device import Device
 if TYPE_CHECKING:
     from god.devices.gic import GIC
 
+# Transmitted bytes are written out at the end of each line, or once this
+# many have piled up without one
+_TX_FLUSH_THRESHOLD = 64
+
+# Register bits the per-access handlers use, as module globals: reading one
+# is a single global lookup instead of a search through the instance and
+# class. PL011UART exposes the same values as class attributes.
+_FR_TXFE = 1 << 7
+_FR_RXFE = 1 << 4
+_INT_RX = 1 << 4
+
+# FR value, indexed by whether the receive FIFO is empty. Transmit FIFO is
+# always empty - we send instantly - so TXFE is always set, and RXFE is set
+# unless we have buffered input.
+_FR_TABLE = (_FR_TXFE, _FR_TXFE | _FR_RXFE)
+
+# UARTs that may still hold unwritten output, drained when the process exits
+_live_uarts: "weakref.WeakSet[PL011UART]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_uarts() -> None:
+    for uart in list(_live_uarts):
+        uart.flush()
+
 
 class PL011UART(Device):
     """
@@ -40,6 +71,32 @@ class PL011UART(Device):
         uart.inject_input(b"ls\\n")
     """
 
+    # Registers are read and written on every MMIO exit; slots make those
+    # attribute accesses fixed-offset loads instead of dict lookups.
+    # (_size comes from Device; __weakref__ lets _live_uarts track us.)
+    __slots__ = (
+        "_output",
+        "_binary_output",
+        "_output_fd",
+        "_base_address",
+        "_irq",
+        "_cr",
+        "_lcr_h",
+        "_ibrd",
+        "_fbrd",
+        "_imsc",
+        "_ris",
+        "_mis",
+        "_rx_buffer",
+        "_gic",
+        "_inject_irq",
+        "_irq_asserted",
+        "_tx_buf",
+        "_read_handlers",
+        "_write_handlers",
+        "__weakref__",
+    )
+
     # ==========================================================================
     # Register Offsets
     # ==========================================================================
@@ -65,11 +122,11 @@ class PL011UART(Device):
     # ==========================================================================
     # These tell the guest about the UART's current status
 
-    FR_TXFE = 1 << 7  # Transmit FIFO Empty (1 = all data sent)
-    FR_RXFF = 1 << 6  # Receive FIFO Full (1 = can't receive more)
-    FR_TXFF = 1 << 5  # Transmit FIFO Full (1 = can't send more)
-    FR_RXFE = 1 << 4  # Receive FIFO Empty (1 = no data to read)
-    FR_BUSY = 1 << 3  # UART Busy transmitting
+    FR_TXFE = _FR_TXFE  # Transmit FIFO Empty (1 = all data sent)
+    FR_RXFF = 1 << 6    # Receive FIFO Full (1 = can't receive more)
+    FR_TXFF = 1 << 5    # Transmit FIFO Full (1 = can't send more)
+    FR_RXFE = _FR_RXFE  # Receive FIFO Empty (1 = no data to read)
+    FR_BUSY = 1 << 3    # UART Busy transmitting
 
     # ==========================================================================
     # Control Register (CR) Bits
@@ -83,7 +140,7 @@ class PL011UART(Device):
     # Interrupt Bits (for IMSC, RIS, MIS, ICR)
     # ==========================================================================
 
-    INT_RX = 1 << 4     # Receive interrupt (RXIS)
+    INT_RX = _INT_RX    # Receive interrupt (RXIS)
     INT_TX = 1 << 5     # Transmit interrupt (TXIS)
     INT_RT = 1 << 6     # Receive timeout interrupt (RTIS)
     INT_OE = 1 << 10    # Overrun error interrupt (OEIS)
@@ -100,15 +157,30 @@ class PL011UART(Device):
 
         Args:
             output: Where to write output characters. Defaults to stdout.
-                    You can pass a StringIO for testing.
+                    You can pass a StringIO for testing. If the stream has
+                    a file descriptor, guest bytes are written straight to
+                    it (or else to its binary layer, like sys.stdout.buffer,
+                    if it has one), so anything printed to the stream
+                    should be flushed before the guest runs.
             base_address: MMIO base address. Defaults to layout.UART.base.
             size: MMIO region size. Defaults to layout.UART.size.
             irq: Interrupt number for the UART (default: 33 = SPI 1).
         """
         self._output = output
+        # The guest sends raw bytes, often UTF-8. Writing them to the binary
+        # layer skips a chr() and text encode per byte, and keeps multi-byte
+        # sequences intact instead of encoding each byte as its own char.
+        self._binary_output = getattr(output, "buffer", None)
+        # Better still, for a real file or terminal: os.write() on its fd
+        # skips the io layers altogether
+        try:
+            self._output_fd = output.fileno()
+        except (AttributeError, OSError, ValueError):
+            self._output_fd = -1
         self._base_address = base_address if base_address is not None else UART.base
         self._size = size if size is not None else UART.size
         self._irq = irq
+        super().__init__()
 
         # Internal register state
         # Most of these are write-only or we ignore them, but we store
@@ -119,17 +191,31 @@ class PL011UART(Device):
         self._fbrd = 0        # Fractional Baud Rate Divisor
         self._imsc = 0        # Interrupt Mask
         self._ris = 0         # Raw Interrupt Status
+        # Masked Interrupt Status (RIS & IMSC). The guest's interrupt handler
+        # reads it on every interrupt, so it's kept up to date by
+        # _set_ris()/_set_imsc() rather than computed on each read.
+        self._mis = 0
 
         # Receive buffer for input support
-        # Characters injected via inject_input() go here
-        self._rx_buffer: list[int] = []
+        # Characters injected via inject_input() go here. The guest reads
+        # them from the front one at a time, which a deque does in O(1).
+        self._rx_buffer: deque[int] = deque()
 
         # GIC reference for interrupt injection (set by VMRunner)
         self._gic: "GIC | None" = None
+        # The GIC's bound inject_irq(), looked up once in set_gic()
+        self._inject_irq: Callable[..., None] | None = None
 
         # Track if IRQ is currently asserted (for level-triggered semantics)
         self._irq_asserted = False
 
+        # Transmit buffer: bytes the guest wrote to DR that haven't been
+        # written to the output yet (see flush())
+        self._tx_buf = bytearray()
+        _live_uarts.add(self)
+
+        self._build_register_handlers()
+
     @property
     def name(self) -> str:
         return "PL011 UART"
@@ -157,110 +243,142 @@ class PL011UART(Device):
             gic: The GIC instance to use for injecting interrupts.
         """
         self._gic = gic
+        self._inject_irq = gic.inject_irq
 
     def read(self, offset: int, size: int) -> int:
         """Handle a read from the UART."""
-
-        if offset == self.DR:
-            # Data Register read - return received character (if any)
-            if self._rx_buffer:
-                char = self._rx_buffer.pop(0)
-                # Update interrupt state after read
-                self._update_rx_interrupt()
-                return char
-            return 0
-
-        elif offset == self.FR:
-            # Flag Register - tell guest about our status
-            flags = 0
-
-            # Transmit FIFO is always empty - we send instantly
-            flags |= self.FR_TXFE
-
-            # Receive FIFO is empty unless we have buffered input
-            if not self._rx_buffer:
-                flags |= self.FR_RXFE
-
-            return flags
-
-        elif offset == self.RSR:
-            # Receive Status Register - no errors to report
-            return 0
-
-        elif offset == self.CR:
-            return self._cr
-
-        elif offset == self.LCR_H:
-            return self._lcr_h
-
-        elif offset == self.IBRD:
-            return self._ibrd
-
-        elif offset == self.FBRD:
-            return self._fbrd
-
-        elif offset == self.IMSC:
-            return self._imsc
-
-        elif offset == self.RIS:
-            return self._ris
-
-        elif offset == self.MIS:
-            # Masked Interrupt Status = RIS & IMSC
-            return self._ris & self._imsc
-
-        else:
+        handler = self._read_handlers.get(offset)
+        if handler is None:
             # Unknown register - return 0
             # Real hardware might return different values, but 0 is safe
             return 0
+        return handler()
 
     def write(self, offset: int, size: int, value: int):
         """Handle a write to the UART."""
+        handler = self._write_handlers.get(offset)
+        # Other registers are read-only or not important for basic operation
+        if handler is not None:
+            handler(value)
 
-        if offset == self.DR:
-            # Data Register write - output the character!
-            # Bottom 8 bits are the character to send
-            char = value & 0xFF
-            self._output.write(chr(char))
-            self._output.flush()  # Make sure it appears immediately
-
-        elif offset == self.RSR:
-            # Writing to RSR clears error flags (we have none)
-            pass
-
-        elif offset == self.CR:
-            self._cr = value
-
-        elif offset == self.LCR_H:
-            self._lcr_h = value
-
-        elif offset == self.IBRD:
-            self._ibrd = value
+    def _build_register_handlers(self) -> None:
+        """
+        Build the offset -> handler tables used by read() and write().
 
-        elif offset == self.FBRD:
-            self._fbrd = value
+        The guest polls FR for every character it sends, so register
+        dispatch is on the hot path. One dict lookup replaces walking an
+        if/elif chain over up to ten offsets.
+        """
+        self._read_handlers: dict[int, Callable[[], int]] = {
+            self.DR: self._read_dr,
+            self.FR: self._read_fr,
+            # Receive Status Register - no errors to report
+            self.RSR: lambda: 0,
+            self.CR: lambda: self._cr,
+            self.LCR_H: lambda: self._lcr_h,
+            self.IBRD: lambda: self._ibrd,
+            self.FBRD: lambda: self._fbrd,
+            self.IMSC: lambda: self._imsc,
+            self.RIS: lambda: self._ris,
+            # Masked Interrupt Status = RIS & IMSC
+            self.MIS: lambda: self._mis,
+        }
 
-        elif offset == self.IMSC:
-            self._imsc = value
+        # Registers we only store are written with setattr in C, without
+        # a Python function call of their own
+        self._write_handlers: dict[int, Callable[[int], None]] = {
+            self.DR: self._write_dr,
+            # Writing to RSR clears error flags (we have none)
+            self.RSR: lambda _value: None,
+            self.CR: partial(setattr, self, "_cr"),
+            self.LCR_H: partial(setattr, self, "_lcr_h"),
+            self.IBRD: partial(setattr, self, "_ibrd"),
+            self.FBRD: partial(setattr, self, "_fbrd"),
             # Mask change might affect interrupt state
-            self._update_irq_line()
-
-        elif offset == self.ICR:
-            # Interrupt Clear Register - clear specified interrupts
-            self._ris &= ~value
-            # Update IRQ line after clearing
-            self._update_irq_line()
+            self.IMSC: self._set_imsc,
+            self.ICR: self._write_icr,
+        }
+
+    def _read_dr(self) -> int:
+        """Data Register read - return received character (if any)."""
+        rx_buffer = self._rx_buffer
+        if rx_buffer:
+            char = rx_buffer.popleft()
+            # Update interrupt state after read - but only if it changes.
+            # While data remains and RX is still raised there's nothing to
+            # do, which is the case for every byte of a paste but the last.
+            # (If the guest cleared RX through ICR mid-drain, it is raised
+            # again, so the rest of the input isn't left without an IRQ.)
+            if not rx_buffer or not self._ris & _INT_RX:
+                self._update_rx_interrupt()
+            return char
+        return 0
+
+    def _read_fr(self) -> int:
+        """Flag Register - tell guest about our status."""
+        # The guest polls this before every character it sends, so the
+        # flags come from a table instead of being assembled each time
+        return _FR_TABLE[not self._rx_buffer]
+
+    def _write_dr(self, value: int) -> None:
+        """Data Register write - output the character!"""
+        # Bottom 8 bits are the character to send
+        char = value & 0xFF
+        # The guest sends one byte per MMIO exit. Writing and flushing each
+        # one would cost a write() syscall per character, so collect them
+        # and write whole lines.
+        tx_buf = self._tx_buf
+        tx_buf.append(char)
+        if char == 0x0A or len(tx_buf) >= _TX_FLUSH_THRESHOLD:
+            self.flush()
+
+    def _write_icr(self, value: int) -> None:
+        """Interrupt Clear Register - clear specified interrupts."""
+        self._set_ris(self._ris & ~value)
+
+    def flush(self) -> None:
+        """
+        Write out any buffered transmit bytes.
 
-        # Other registers are read-only or not important for basic operation
+        Output is flushed automatically at each newline and every
+        _TX_FLUSH_THRESHOLD bytes. Call this when a partial line (like a
+        shell prompt) should appear, or before writing to the same
+        terminal by other means so the output stays in order.
+        """
+        tx_buf = self._tx_buf
+        if not tx_buf:
+            return
+        if self._output.closed:
+            # Whoever owns the stream has closed it, and its fd number may
+            # already belong to an unrelated file: drop the output rather
+            # than write it there
+            tx_buf.clear()
+            return
+        if self._output_fd >= 0:
+            # The buffer is already bytes: write it as is, dropping
+            # whatever each (possibly partial) write took
+            while tx_buf:
+                del tx_buf[: os.write(self._output_fd, tx_buf)]
+            return
+        if self._binary_output is not None:
+            self._binary_output.write(tx_buf)
+            self._binary_output.flush()  # Make sure it appears immediately
+        else:
+            # One char per byte, as the guest sent them
+            self._output.write(tx_buf.decode("latin-1"))
+            self._output.flush()
+        tx_buf.clear()
 
     def reset(self):
         """Reset the UART to initial state."""
+        self.flush()
         self._cr = 0
         self._lcr_h = 0
         self._ibrd = 0
         self._fbrd = 0
         self._imsc = 0
         self._ris = 0
+        self._mis = 0
         self._rx_buffer.clear()
         self._irq_asserted = False
 
@@ -277,14 +395,11 @@ class PL011UART(Device):
         Args:
             data: Bytes to make available to the guest.
         """
-        for byte in data:
-            self._rx_buffer.append(byte)
-
-        # Set RX interrupt status (data available)
-        self._ris |= self.INT_RX
+        self._rx_buffer.extend(data)
 
-        # Update IRQ line (will assert if guest has RX interrupts enabled)
-        self._update_irq_line()
+        # Set RX interrupt status (data available). This updates the IRQ
+        # line too, which asserts if the guest has RX interrupts enabled.
+        self._set_ris(self._ris | self.INT_RX)
 
     def _update_rx_interrupt(self) -> None:
         """
@@ -294,11 +409,21 @@ class PL011UART(Device):
         """
         if self._rx_buffer:
             # Still have data - keep interrupt set
-            self._ris |= self.INT_RX
+            self._set_ris(self._ris | self.INT_RX)
         else:
             # Buffer empty - clear RX interrupt
-            self._ris &= ~self.INT_RX
+            self._set_ris(self._ris & ~self.INT_RX)
+
+    def _set_ris(self, value: int) -> None:
+        """Set the raw interrupt status, then MIS and the IRQ line to match."""
+        self._ris = value
+        self._mis = value & self._imsc
+        self._update_irq_line()
 
+    def _set_imsc(self, value: int) -> None:
+        """Set the interrupt mask, then MIS and the IRQ line to match."""
+        self._imsc = value
+        self._mis = self._ris & value
         self._update_irq_line()
 
     def _update_irq_line(self) -> None:
@@ -312,16 +437,17 @@ class PL011UART(Device):
         The IRQ stays asserted as long as the interrupt condition exists.
         The guest must service the interrupt (read data) to clear it.
         """
-        if self._gic is None:
+        inject_irq = self._inject_irq
+        if inject_irq is None:
             return
 
-        mis = self._ris & self._imsc
+        mis = self._mis
 
         if mis and not self._irq_asserted:
             # Condition exists and line not yet asserted - assert it
-            self._gic.inject_irq(self._irq, level=True)
+            inject_irq(self._irq, level=True)
             self._irq_asserted = True
         elif not mis and self._irq_asserted:
             # Condition cleared - deassert the line
-            self._gic.inject_irq(self._irq, level=False)
+            inject_irq(self._irq, level=False)
             self._irq_asserted = False
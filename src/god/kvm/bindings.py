@@ -37,9 +37,6 @@ ffi.cdef("""
     void *mmap(void *addr, size_t length, int prot, int flags, int fd, long offset);
     int munmap(void *addr, size_t length);
 
-    // Error handling
-    int *__errno_location(void);
-
     // Memory region structure for KVM_SET_USER_MEMORY_REGION
     // This tells KVM how to map guest physical addresses to host memory.
     struct kvm_userspace_memory_region {
@@ -101,6 +98,34 @@ ffi.cdef("""
 # This creates a dynamic library we can call from Python
 lib = ffi.dlopen(None)  # None means use the C library
 
+# Fixed-signature views of ioctl().
+#
+# lib.ioctl is declared variadic (that's how libc declares it), which has
+# two costs on every call: cffi has to build a fresh libffi call interface
+# for the variadic arguments, and an int argument has to be wrapped in
+# ffi.cast("int", ...) first because cffi can't guess its C type.
+#
+# The kernel always reads the third argument as one unsigned long, and on
+# the ABIs we run on (arm64 and x86-64 Linux) a variadic argument is passed
+# in the same register as a fixed one. So we can declare ioctl again with a
+# fixed third argument and call that instead. A function can only be
+# declared once per FFI instance, hence one small FFI per signature. The
+# structs passed as pointers still come from `ffi` above; any cffi pointer
+# converts to void *.
+_ioctl_int_ffi = FFI()
+_ioctl_int_ffi.cdef("int ioctl(int fd, unsigned long request, unsigned long arg);")
+
+_ioctl_ptr_ffi = FFI()
+_ioctl_ptr_ffi.cdef("int ioctl(int fd, unsigned long request, void *arg);")
+
+# ioctl_int(fd, request, value): for ioctls that take a plain integer (or
+# nothing, pass 0), e.g. KVM_CHECK_EXTENSION or KVM_RUN
+ioctl_int = _ioctl_int_ffi.dlopen(None).ioctl
+
+# ioctl_ptr(fd, request, pointer): for ioctls that take a pointer to a
+# struct, e.g. KVM_SET_ONE_REG
+ioctl_ptr = _ioctl_ptr_ffi.dlopen(None).ioctl
+
 
 def get_errno() -> int:
     """
@@ -109,5 +134,9 @@ def get_errno() -> int:
     errno is a global variable in C that contains the error code from
     the last system call that failed. We need to check it after ioctl
     calls to know what went wrong.
+
+    cffi saves errno right after every C call it makes, so this is the
+    value from our last call, even if the interpreter has made other
+    system calls since. Reading it doesn't need a call into C either.
     """
-    return lib.__errno_location()[0]
+    return ffi.errno
@@ -5,9 +5,20 @@ This module queries KVM for its supported capabilities and provides
 human-readable descriptions of each.
 """
 
+from collections.abc import Iterable
 from dataclasses import dataclass
+from typing import Protocol
 
-from .system import KVMSystem
+
+class ExtensionChecker(Protocol):
+    """
+    Anything that can check KVM capabilities, like an open KVMSystem.
+
+    query_capabilities() only needs check_extensions(), so tests can pass
+    a stand-in without opening /dev/kvm.
+    """
+
+    def check_extensions(self, capabilities: Iterable[int]) -> list[int]: ...
 
 
 @dataclass
@@ -88,28 +99,26 @@ CAPABILITIES = [
 ]
 
 
-def query_capabilities(kvm: KVMSystem) -> list[Capability]:
+def query_capabilities(kvm: ExtensionChecker) -> list[Capability]:
     """
     Query all known capabilities from KVM.
 
     Args:
-        kvm: An open KVMSystem instance.
+        kvm: An open KVMSystem instance (or anything with check_extensions()).
 
     Returns:
         List of Capability objects with values filled in.
     """
-    results = []
-    for cap in CAPABILITIES:
-        value = kvm.check_extension(cap.number)
-        results.append(
-            Capability(
-                name=cap.name,
-                number=cap.number,
-                description=cap.description,
-                value=value,
-            )
+    values = kvm.check_extensions([cap.number for cap in CAPABILITIES])
+    return [
+        Capability(
+            name=cap.name,
+            number=cap.number,
+            description=cap.description,
+            value=value,
         )
-    return results
+        for cap, value in zip(CAPABILITIES, values, strict=True)
+    ]
 
 
 def format_capabilities(capabilities: list[Capability]) -> str:
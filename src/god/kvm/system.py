@@ -5,7 +5,9 @@ This module handles opening /dev/kvm and performing system-level queries
 like checking the API version and supported capabilities.
 """
 
-from .bindings import ffi, get_errno, lib
+from collections.abc import Iterable
+
+from .bindings import get_errno, ioctl_int, lib
 from .constants import (
     KVM_CHECK_EXTENSION,
     KVM_GET_API_VERSION,
@@ -73,9 +75,9 @@ class KVMSystem:
                 raise KVMError(f"Failed to open {device_path}: errno {errno}")
 
         # Check API version
-        # Note: cffi varargs require an explicit third argument, even for ioctls
-        # that don't need data. We pass 0 cast to int.
-        self._api_version = lib.ioctl(self._fd, KVM_GET_API_VERSION, ffi.cast("int", 0))
+        # Note: ioctl_int always takes a third argument, even for ioctls
+        # that don't need data. We pass 0.
+        self._api_version = ioctl_int(self._fd, KVM_GET_API_VERSION, 0)
         if self._api_version < 0:
             self.close()
             raise KVMError(f"Failed to get KVM API version: errno {get_errno()}")
@@ -135,12 +137,31 @@ class KVMSystem:
             (the exact value may have meaning depending on the capability).
         """
         # The capability number is passed as the third argument to the ioctl
-        result = lib.ioctl(self._fd, KVM_CHECK_EXTENSION, ffi.cast("int", capability))
+        result = ioctl_int(self._fd, KVM_CHECK_EXTENSION, capability)
         if result < 0:
             # Some capabilities return -1 for "not supported" instead of 0
             return 0
         return result
 
+    def check_extensions(self, capabilities: Iterable[int]) -> list[int]:
+        """
+        Check several KVM extensions/capabilities at once.
+
+        Same as calling check_extension() for each one, but the fd and
+        ioctl are looked up once for the whole batch. Each capability is
+        still its own ioctl; KVM has no call that checks more than one.
+
+        Args:
+            capabilities: The capability numbers (KVM_CAP_*).
+
+        Returns:
+            One value per capability, in the same order, with the same
+            meaning as check_extension()'s return value.
+        """
+        fd = self._fd
+        ioctl = ioctl_int
+        return [max(ioctl(fd, KVM_CHECK_EXTENSION, cap), 0) for cap in capabilities]
+
     def get_vcpu_mmap_size(self) -> int:
         """
         Get the size of the memory area to mmap for each vCPU.
@@ -151,7 +172,7 @@ class KVMSystem:
         Returns:
             Size in bytes.
         """
-        size = lib.ioctl(self._fd, KVM_GET_VCPU_MMAP_SIZE, ffi.cast("int", 0))
+        size = ioctl_int(self._fd, KVM_GET_VCPU_MMAP_SIZE, 0)
         if size < 0:
             raise KVMError(f"Failed to get vCPU mmap size: errno {get_errno()}")
         return size
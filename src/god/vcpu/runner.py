@@ -39,6 +39,24 @@ class RunnerError(Exception):
     pass
 
 
+def _flush_log(log: bytearray, uart: PL011UART | None) -> None:
+    """
+    Write buffered debug lines to stdout and clear the buffer.
+
+    Guest output the UART is holding and anything print() has buffered
+    are flushed first, so the lines come out in the order they were
+    produced.
+    """
+    if uart is not None:
+        uart.flush()
+    if not log:
+        return
+    sys.stdout.flush()
+    fd = sys.stdout.fileno()
+    while log:
+        del log[: os.write(fd, log)]
+
+
 class VMRunner:
     """
     Runs a virtual machine.
@@ -103,7 +121,7 @@ class VMRunner:
         if self._gic is None:
             return
 
-        for device in self._devices._devices:
+        for device in self._devices.devices:
             if isinstance(device, PL011UART):
                 device.set_gic(self._gic)
                 self._uart = device
@@ -326,92 +344,122 @@ class VMRunner:
         # Get file descriptor for stdin if interactive
         stdin_fd = term.fd if term else -1
 
-        for i in range(max_exits):
-            # Check for stdin input if interactive
-            # We use select() with timeout=0 for a non-blocking check.
-            # This happens between vCPU runs when we get interrupted by SIGALRM.
-            if term is not None and self._uart is not None:
-                readable, _, _ = select.select([stdin_fd], [], [], 0)
-                if stdin_fd in readable:
-                    data = os.read(stdin_fd, 256)
-                    if data:
-                        self._uart.inject_input(data)
-                # Clear immediate_exit before running
-                # (it may have been set by our SIGALRM handler)
-                vcpu.set_immediate_exit(False)
-
-            # Run the vCPU - this blocks until the guest exits or SIGALRM
-            if not quiet and i < 5:
-                print(f"  [vCPU run #{i}]")
-            exit_reason = vcpu.run()
-
-            if not quiet and i < 5:
+        # The UART buffers guest output until the end of a line; we flush
+        # it ourselves whenever a partial line should become visible
+        uart = self._uart
+
+        # Debug lines are formatted into this buffer and written with one
+        # os.write() at a time, instead of going through print() line by
+        # line. We flush before KVM_RUN (so a stuck vCPU still shows its
+        # last lines) and before MMIO dispatch (so the lines stay ordered
+        # with guest output from the UART).
+        log = bytearray()
+
+        try:
+            for i in range(max_exits):
+                # Check for stdin input if interactive
+                # We use select() with timeout=0 for a non-blocking check.
+                # This happens between vCPU runs when we get interrupted by SIGALRM.
+                if term is not None and self._uart is not None:
+                    readable, _, _ = select.select([stdin_fd], [], [], 0)
+                    if stdin_fd in readable:
+                        data = os.read(stdin_fd, 256)
+                        if data:
+                            self._uart.inject_input(data)
+                    # Clear immediate_exit before running
+                    # (it may have been set by our SIGALRM handler)
+                    vcpu.set_immediate_exit(False)
+
+                # Run the vCPU - this blocks until the guest exits or SIGALRM
+                if not quiet and i < 5:
+                    log += b"  [vCPU run #%d]\n" % i
+                if log:
+                    _flush_log(log, uart)
+                exit_reason = vcpu.run()
+
+                if not quiet and i < 5:
+                    exit_name = vcpu.get_exit_reason_name(exit_reason)
+                    log += b"  [vCPU exit: %s]\n" % exit_name.encode()
+
+                # Handle signal interruption (EINTR)
+                # In interactive mode, this happens every 100ms from our timer.
+                # We continue the loop to check stdin for input. It's also
+                # when a prompt or echoed keystroke without a newline gets
+                # written out.
+                if exit_reason == -1:
+                    if uart is not None:
+                        uart.flush()
+                    continue
+
+                # Track statistics
+                stats["exits"] += 1
                 exit_name = vcpu.get_exit_reason_name(exit_reason)
-                print(f"  [vCPU exit: {exit_name}]")
-
-            # Handle signal interruption (EINTR)
-            # In interactive mode, this happens every 100ms from our timer.
-            # We continue the loop to check stdin for input.
-            if exit_reason == -1:
-                continue
-
-            # Track statistics
-            stats["exits"] += 1
-            exit_name = vcpu.get_exit_reason_name(exit_reason)
-            stats["exit_counts"][exit_name] = (
-                stats["exit_counts"].get(exit_name, 0) + 1
-            )
-            stats["exit_reason"] = exit_name
-
-            # Handle the exit based on its type
-            if exit_reason == KVM_EXIT_HLT:
-                # Guest executed HLT instruction.
-                # Note: On ARM, WFI typically doesn't cause KVM_EXIT_HLT -
-                # KVM handles it internally. But if we do get here, treat it
-                # as the guest wanting to halt.
-                stats["hlt"] = True
-                break
-
-            elif exit_reason == KVM_EXIT_MMIO:
-                # Guest tried to access memory that isn't RAM
-                # Dispatch to the device registry to handle it
-                if not quiet:
-                    if stats["exits"] <= 10:
-                        # Show first 10 MMIO accesses for debugging
-                        phys_addr, _, length, is_write = vcpu.get_mmio_info()
-                        op = "W" if is_write else "R"
-                        print(f"  MMIO[{stats['exits']}]: {op} 0x{phys_addr:08x} ({length}B)")
-                    elif stats["exits"] % 100000 == 0:
-                        # Progress indicator
-                        print(f"  ... {stats['exits']} exits ...")
-                self._handle_mmio(vcpu)
-
-            elif exit_reason == KVM_EXIT_SYSTEM_EVENT:
-                # Guest requested shutdown or reset
-                # On ARM, this usually comes through PSCI (Power State
-                # Coordination Interface)
-                if not quiet:
-                    print("\n[Guest requested shutdown/reset]")
-                break
+                stats["exit_counts"][exit_name] = (
+                    stats["exit_counts"].get(exit_name, 0) + 1
+                )
+                stats["exit_reason"] = exit_name
+
+                # Handle the exit based on its type
+                if exit_reason == KVM_EXIT_HLT:
+                    # Guest executed HLT instruction.
+                    # Note: On ARM, WFI typically doesn't cause KVM_EXIT_HLT -
+                    # KVM handles it internally. But if we do get here, treat it
+                    # as the guest wanting to halt.
+                    stats["hlt"] = True
+                    break
+
+                elif exit_reason == KVM_EXIT_MMIO:
+                    # Guest tried to access memory that isn't RAM
+                    # Dispatch to the device registry to handle it
+                    if not quiet:
+                        if stats["exits"] <= 10:
+                            # Show first 10 MMIO accesses for debugging
+                            phys_addr, _, length, is_write = vcpu.get_mmio_info()
+                            log += b"  MMIO[%d]: %s 0x%08x (%dB)\n" % (
+                                stats["exits"],
+                                b"W" if is_write else b"R",
+                                phys_addr,
+                                length,
+                            )
+                        elif stats["exits"] % 100000 == 0:
+                            # Progress indicator
+                            log += b"  ... %d exits ...\n" % stats["exits"]
+                        # Devices (the UART) may print while handling the access
+                        if log:
+                            _flush_log(log, uart)
+                    self._handle_mmio(vcpu)
+
+                elif exit_reason == KVM_EXIT_SYSTEM_EVENT:
+                    # Guest requested shutdown or reset
+                    # On ARM, this usually comes through PSCI (Power State
+                    # Coordination Interface)
+                    if not quiet:
+                        log += b"\n[Guest requested shutdown/reset]\n"
+                    break
+
+                elif exit_reason == KVM_EXIT_INTERNAL_ERROR:
+                    # Something went wrong inside KVM
+                    _flush_log(log, uart)
+                    print("\n[KVM internal error]")
+                    vcpu.dump_registers()
+                    raise RunnerError("KVM internal error")
 
-            elif exit_reason == KVM_EXIT_INTERNAL_ERROR:
-                # Something went wrong inside KVM
-                print("\n[KVM internal error]")
-                vcpu.dump_registers()
-                raise RunnerError("KVM internal error")
-
-            elif exit_reason == KVM_EXIT_FAIL_ENTRY:
-                # The CPU failed to enter guest mode
-                # Usually means we set up the vCPU state incorrectly
-                print("\n[Failed to enter guest mode]")
-                vcpu.dump_registers()
-                raise RunnerError("Entry to guest mode failed")
-
-            else:
-                # Unknown exit - print info and stop
-                if not quiet:
-                    print(f"\n[Unhandled exit: {exit_name}]")
+                elif exit_reason == KVM_EXIT_FAIL_ENTRY:
+                    # The CPU failed to enter guest mode
+                    # Usually means we set up the vCPU state incorrectly
+                    _flush_log(log, uart)
+                    print("\n[Failed to enter guest mode]")
                     vcpu.dump_registers()
-                break
+                    raise RunnerError("Entry to guest mode failed")
+
+                else:
+                    # Unknown exit - print info and stop
+                    if not quiet:
+                        _flush_log(log, uart)
+                        print(f"\n[Unhandled exit: {exit_name}]")
+                        vcpu.dump_registers()
+                    break
+        finally:
+            _flush_log(log, uart)
 
         return stats
@@ -6,7 +6,7 @@ A vCPU is what the guest sees as a CPU - it has registers, can execute
 instructions, and traps to the hypervisor for certain operations.
 """
 
-from god.kvm.bindings import ffi, lib, get_errno
+from god.kvm.bindings import ffi, lib, get_errno, ioctl_int, ioctl_ptr
 from god.kvm.constants import (
     KVM_CREATE_VCPU,
     KVM_RUN,
@@ -74,8 +74,8 @@ class VCPU:
 
         # Step 1: Create the vCPU
         # This gives us a file descriptor for vCPU-specific operations
-        # Note: vcpu_id must be cast to int for cffi's variadic ioctl
-        self._fd = lib.ioctl(vm_fd, KVM_CREATE_VCPU, ffi.cast("int", vcpu_id))
+        # The vCPU id is passed directly as the ioctl argument
+        self._fd = ioctl_int(vm_fd, KVM_CREATE_VCPU, vcpu_id)
         if self._fd < 0:
             raise VCPUError(f"Failed to create vCPU {vcpu_id}: errno {get_errno()}")
 
@@ -119,7 +119,7 @@ class VCPU:
         # Note: KVM_ARM_PREFERRED_TARGET is called on the VM fd, not /dev/kvm
         init = ffi.new("struct kvm_vcpu_init *")
 
-        result = lib.ioctl(self._vm_fd, KVM_ARM_PREFERRED_TARGET, init)
+        result = ioctl_ptr(self._vm_fd, KVM_ARM_PREFERRED_TARGET, init)
         if result < 0:
             raise VCPUError(
                 f"Failed to get preferred target: errno {get_errno()}"
@@ -132,7 +132,7 @@ class VCPU:
         init.features[0] |= (1 << KVM_ARM_VCPU_PSCI_0_2)
 
         # Now initialize the vCPU with that configuration
-        result = lib.ioctl(self._fd, KVM_ARM_VCPU_INIT, init)
+        result = ioctl_ptr(self._fd, KVM_ARM_VCPU_INIT, init)
         if result < 0:
             raise VCPUError(f"Failed to initialize vCPU: errno {get_errno()}")
 
@@ -164,7 +164,7 @@ class VCPU:
         reg.id = reg_id
         reg.addr = int(ffi.cast("uintptr_t", value))
 
-        result = lib.ioctl(self._fd, KVM_GET_ONE_REG, reg)
+        result = ioctl_ptr(self._fd, KVM_GET_ONE_REG, reg)
         if result < 0:
             raise VCPUError(
                 f"Failed to get register {registers.get_register_name(reg_id)}: "
@@ -193,13 +193,45 @@ class VCPU:
         reg.id = reg_id
         reg.addr = int(ffi.cast("uintptr_t", value_ptr))
 
-        result = lib.ioctl(self._fd, KVM_SET_ONE_REG, reg)
+        result = ioctl_ptr(self._fd, KVM_SET_ONE_REG, reg)
         if result < 0:
             raise VCPUError(
                 f"Failed to set register {registers.get_register_name(reg_id)}: "
                 f"errno {get_errno()}"
             )
 
+    def set_registers(self, values: dict[int, int]):
+        """
+        Set several registers at once.
+
+        ARM64 KVM has no KVM_SET_REGS equivalent - every register goes
+        through its own KVM_SET_ONE_REG ioctl. What we can avoid is the
+        per-call setup: one value buffer and one kvm_one_reg request are
+        allocated and reused for every register in the batch.
+
+        Registers are written in the dict's insertion order.
+
+        Args:
+            values: Mapping of register ID (from registers module) to value.
+
+        Raises:
+            VCPUError: If setting any register fails. Registers earlier in
+                the batch have already been written.
+        """
+        value_ptr = ffi.new("uint64_t *")
+        reg = ffi.new("struct kvm_one_reg *")
+        reg.addr = int(ffi.cast("uintptr_t", value_ptr))
+
+        fd = self._fd
+        for reg_id, value in values.items():
+            value_ptr[0] = value
+            reg.id = reg_id
+            if ioctl_ptr(fd, KVM_SET_ONE_REG, reg) < 0:
+                raise VCPUError(
+                    f"Failed to set register {registers.get_register_name(reg_id)}: "
+                    f"errno {get_errno()}"
+                )
+
     # Convenience methods for common registers
 
     def get_pc(self) -> int:
@@ -261,7 +293,7 @@ class VCPU:
         Raises:
             VCPUError: If KVM_RUN fails unexpectedly.
         """
-        result = lib.ioctl(self._fd, KVM_RUN, ffi.cast("int", 0))
+        result = ioctl_int(self._fd, KVM_RUN, 0)
         if result < 0:
             errno = get_errno()
             # EINTR (4) means we were interrupted by a signal.
@@ -5,7 +5,7 @@ This module provides the main VM class that represents a virtual machine
 and manages its resources (memory, vCPUs, devices).
 """
 
-from god.kvm.bindings import ffi, lib, get_errno
+from god.kvm.bindings import lib, get_errno, ioctl_int
 from god.kvm.constants import KVM_CREATE_VM
 from god.kvm.system import KVMSystem
 from .memory import MemoryManager, MemorySlot
@@ -49,7 +49,7 @@ class VirtualMachine:
 
         # Create the VM
         # The argument is the machine type. 0 means default.
-        self._fd = lib.ioctl(kvm.fd, KVM_CREATE_VM, ffi.cast("int", 0))
+        self._fd = ioctl_int(kvm.fd, KVM_CREATE_VM, 0)
         if self._fd < 0:
             raise VMError(f"Failed to create VM: errno {get_errno()}")
 
@@ -0,0 +1,21 @@
+import errno
+import os
+import termios
+
+from god.kvm.bindings import ffi, get_errno, ioctl_int, ioctl_ptr, lib
+
+
+def test_get_errno_reports_failed_call() -> None:
+    assert lib.open(b"/nonexistent/god-test", 0) == -1
+    assert get_errno() == errno.ENOENT
+
+
+def test_typed_ioctls_take_plain_ints_and_pointers() -> None:
+    fd = os.open("/dev/null", os.O_RDONLY)
+    try:
+        assert ioctl_int(fd, termios.TIOCGWINSZ, 0) == -1
+        assert get_errno() == errno.ENOTTY
+        assert ioctl_ptr(fd, termios.FIONREAD, ffi.new("struct kvm_one_reg *")) == -1
+        assert get_errno() == errno.ENOTTY
+    finally:
+        os.close(fd)
@@ -0,0 +1,21 @@
+from collections.abc import Iterable
+
+from god.kvm.capabilities import CAPABILITIES, query_capabilities
+
+
+class FakeKVM:
+    def __init__(self) -> None:
+        self.calls: list[list[int]] = []
+
+    def check_extensions(self, capabilities: Iterable[int]) -> list[int]:
+        self.calls.append(list(capabilities))
+        return [number + 1 for number in capabilities]
+
+
+def test_query_capabilities_checks_all_in_one_batch() -> None:
+    kvm = FakeKVM()
+    results = query_capabilities(kvm)
+    assert kvm.calls == [[cap.number for cap in CAPABILITIES]]
+    assert [cap.name for cap in results] == [cap.name for cap in CAPABILITIES]
+    assert [cap.value for cap in results] == [cap.number + 1 for cap in CAPABILITIES]
+    assert all(cap.value is None for cap in CAPABILITIES)
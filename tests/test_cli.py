@@ -1,17 +1,41 @@
-from typer.testing import CliRunner
+import pytest
 
-from god.cli import app
+from god.cli import main
 
-runner = CliRunner()
 
+def test_version(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["--version"]) == 0
+    assert "god 0.1.0" in capsys.readouterr().out
 
-def test_version() -> None:
-    result = runner.invoke(app, ["--version"])
-    assert result.exit_code == 0
-    assert "god 0.1.0" in result.stdout
 
+def test_help(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["--help"]) == 0
+    assert "Virtual Machine Monitor" in capsys.readouterr().out
 
-def test_help() -> None:
-    result = runner.invoke(app, ["--help"])
-    assert result.exit_code == 0
-    assert "Virtual Machine Manager" in result.stdout
+
+def test_group_help_lists_subcommands(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["build"]) == 0
+    out = capsys.readouterr().out
+    assert "build kernel" in out
+    assert "test-vm" not in out
+
+
+def test_unknown_command(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["frobnicate"]) == 2
+    assert "no such command" in capsys.readouterr().err
+
+
+def test_command_help(capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit) as exc:
+        main(["boot", "--help"])
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    assert "--no-interactive" in out
+    assert "Boot a Linux kernel." in out
+
+
+def test_run_rejects_bad_entry_point(capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit) as exc:
+        main(["run", "hello.bin", "--entry", "0xzz"])
+    assert exc.value.code == 2
+    assert "invalid entry point: '0xzz'" in capsys.readouterr().err
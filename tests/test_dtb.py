@@ -0,0 +1,61 @@
+import fdt
+
+from god.boot.dtb import DeviceTreeGenerator, DTBConfig, _serialize
+
+
+def test_generate_is_cached_per_config() -> None:
+    gen = DeviceTreeGenerator()
+    first = gen.generate(DTBConfig(ram_size=64 * 1024 * 1024))
+    second = gen.generate(DTBConfig(ram_size=64 * 1024 * 1024))
+    assert first is second
+    assert gen.generate(DTBConfig(ram_size=128 * 1024 * 1024)) is not first
+
+
+def test_generate_builds_through_the_instance() -> None:
+    class NamedCPUs(DeviceTreeGenerator):
+        def _create_cpus(self, config: DTBConfig) -> fdt.Node:
+            cpus = super()._create_cpus(config)
+            cpus.append(fdt.PropStrings("label", "custom"))
+            return cpus
+
+    config = DTBConfig(ram_size=64 * 1024 * 1024)
+    dt = fdt.parse_dtb(NamedCPUs().generate(config))
+    assert dt.get_node("/cpus").get_property("label").value == "custom"
+    plain = fdt.parse_dtb(DeviceTreeGenerator().generate(config))
+    assert plain.get_node("/cpus").get_property("label") is None
+
+
+def test_generate_round_trips_initrd() -> None:
+    config = DTBConfig(
+        ram_size=1024 * 1024 * 1024,
+        initrd_start=0x4800_0000,
+        initrd_end=0x4810_0000,
+    )
+    dt = fdt.parse_dtb(DeviceTreeGenerator().generate(config))
+    chosen = dt.get_node("/chosen")
+    assert list(chosen.get_property("linux,initrd-start").data) == [0, 0x4800_0000]
+    assert list(chosen.get_property("linux,initrd-end").data) == [0, 0x4810_0000]
+    memory = dt.get_node("/memory@40000000")
+    assert list(memory.get_property("reg").data) == [0, 0x4000_0000, 0, 0x4000_0000]
+
+
+def test_generate_header_matches_blob() -> None:
+    blob = DeviceTreeGenerator().generate(DTBConfig(ram_size=512 * 1024 * 1024, num_cpus=2))
+    dt = fdt.parse_dtb(blob)
+    assert dt.header.total_size == len(blob)
+    assert dt.header.version == 17
+    assert [cpu.name for cpu in dt.get_node("/cpus").nodes] == ["cpu@0", "cpu@1"]
+
+
+def test_serialize_matches_fdt_without_patching_it() -> None:
+    node = fdt.Node(
+        "soc",
+        fdt.PropStrings("compatible", "simple-bus"),
+        fdt.PropWords("reg", *range(300)),
+        fdt.Property("ranges"),
+        fdt.Node("leaf", fdt.PropWords("reg", 1)),
+    )
+    out = bytearray()
+    strings = _serialize(node, "compatible\0", out)
+    assert (bytes(out), strings) == node.to_dtb("compatible\0", 0, 17)[:2]
+    assert fdt.PropWords.to_dtb.__module__ == "fdt.items"
@@ -0,0 +1,47 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from god.boot import BootLoader
+from god.vm.layout import RAM_BASE
+
+ARM64_MAGIC = 0x644D5241
+
+
+def write_kernel(path: Path, text_offset: int = 0x80000, size: int = 0x3000) -> Path:
+    header = struct.pack("<IIQQQQQQII", 0, 0, text_offset, 0, 0, 0, 0, 0, ARM64_MAGIC, 0)
+    path.write_bytes(header + bytes(size - len(header)))
+    return path
+
+
+def test_plan_places_components(tmp_path: Path) -> None:
+    kernel = write_kernel(tmp_path / "Image")
+    initrd = tmp_path / "initrd"
+    initrd.write_bytes(b"\x1f\x8b" + bytes(5000))
+
+    # plan() only reads files, so it never touches guest memory
+    plan = BootLoader(None, 256 * 1024 * 1024).plan(kernel, initrd_path=initrd)
+
+    assert plan.kernel_addr == RAM_BASE + 0x80000
+    assert plan.kernel_end == plan.kernel_addr + 0x3000
+    assert plan.initrd_addr == RAM_BASE + 128 * 1024 * 1024
+    assert plan.initrd_end == plan.initrd_addr + 5002
+    assert plan.dtb_addr == plan.initrd_addr + 0x2000
+
+
+def test_plan_without_initrd(tmp_path: Path) -> None:
+    plan = BootLoader(None, 256 * 1024 * 1024).plan(write_kernel(tmp_path / "Image"))
+
+    assert plan.initrd_addr == 0
+    assert plan.initrd_size == 0
+    assert plan.dtb_addr == RAM_BASE + 128 * 1024 * 1024
+
+
+def test_execute_rejects_initrd_without_source(tmp_path: Path) -> None:
+    loader = BootLoader(None, 256 * 1024 * 1024)
+    # A size without a path: the caller meant to pass an open fd
+    plan = loader.plan(write_kernel(tmp_path / "Image"), initrd_size=4096)
+
+    with pytest.raises(ValueError, match="no initrd_fd"):
+        loader.execute(plan, b"")
@@ -0,0 +1,79 @@
+import pytest
+
+from god.devices import Device, DeviceRegistry, MMIOAccess
+
+
+class FakeDevice(Device):
+    def __init__(self, base: int, size: int = 0x1000) -> None:
+        self._base_address = base
+        self._region_size = size
+        self.writes: list[tuple[int, int]] = []
+        super().__init__()
+
+    @property
+    def name(self) -> str:
+        return f"fake@{self._base_address:x}"
+
+    @property
+    def base_address(self) -> int:
+        return self._base_address
+
+    @property
+    def size(self) -> int:
+        return self._region_size
+
+    def read(self, offset: int, _size: int) -> int:
+        return offset
+
+    def write(self, offset: int, _size: int, value: int) -> None:
+        self.writes.append((offset, value))
+
+
+def test_from_devices_dispatches_by_address() -> None:
+    low, high = FakeDevice(0x1000), FakeDevice(0x9000)
+    registry = DeviceRegistry.from_devices((high, low))
+    assert registry.devices == (high, low)
+
+    assert registry.find_device(0x9004) is high
+    assert registry.find_device(0x1fff) is low
+    assert registry.find_device(0x2000) is None
+    assert registry.find_device(0x0fff) is None
+    assert registry.find_device(0xa000) is None
+
+    result = registry.handle_mmio(MMIOAccess(address=0x1010, size=4, is_write=False))
+    assert result.handled and result.data == 0x10
+    registry.handle_mmio(MMIOAccess(address=0x9008, size=4, is_write=True, data=7))
+    assert high.writes == [(8, 7)]
+
+
+def test_from_devices_rejects_overlap() -> None:
+    with pytest.raises(ValueError, match="overlaps"):
+        DeviceRegistry.from_devices((FakeDevice(0x1000), FakeDevice(0x1800)))
+
+
+def test_register_rejects_overlap_with_either_neighbour() -> None:
+    registry = DeviceRegistry.from_devices((FakeDevice(0x1000), FakeDevice(0x4000)))
+    # Starts inside the lower device
+    with pytest.raises(ValueError, match="overlaps with fake@1000"):
+        registry.register(FakeDevice(0x1fff, size=0x10))
+    # Runs into the upper device
+    with pytest.raises(ValueError, match="overlaps with fake@4000"):
+        registry.register(FakeDevice(0x3000, size=0x1001))
+    # Fits exactly in the gap
+    registry.register(FakeDevice(0x2000, size=0x2000))
+    assert len(registry.devices) == 3
+
+
+def test_unhandled_mmio_warnings_are_rate_limited(caplog: pytest.LogCaptureFixture) -> None:
+    registry = DeviceRegistry.from_devices((FakeDevice(0x1000),))
+    with caplog.at_level("WARNING", logger="god.devices.registry"):
+        # A sweep through unmapped space, one access per address
+        for i in range(2048):
+            access = MMIOAccess(address=0x8000 + 4 * i, size=4, is_write=False)
+            result = registry.handle_mmio(access)
+            assert not result.handled and result.data == 0
+    assert [r.getMessage() for r in caplog.records] == [
+        "Unhandled MMIO read at 0x00008000",
+        "Unhandled MMIO read at 0x00008ffc (1024 unhandled accesses so far)",
+        "Unhandled MMIO read at 0x00009ffc (2048 unhandled accesses so far)",
+    ]
@@ -0,0 +1,117 @@
+import io
+
+from god.devices import PL011UART
+
+
+def test_dr_write_to_text_output() -> None:
+    out = io.StringIO()
+    uart = PL011UART(output=out)
+    for byte in b"hi\n":
+        uart.write(PL011UART.DR, 4, byte)
+    assert out.getvalue() == "hi\n"
+
+
+def test_dr_write_buffers_until_newline_or_flush() -> None:
+    out = io.StringIO()
+    uart = PL011UART(output=out)
+    for byte in b"/ # ":
+        uart.write(PL011UART.DR, 4, byte)
+    assert out.getvalue() == ""
+    uart.flush()
+    assert out.getvalue() == "/ # "
+
+    for byte in b"x" * 64:
+        uart.write(PL011UART.DR, 4, byte)
+    assert out.getvalue() == "/ # " + "x" * 64
+
+
+def test_dr_write_keeps_utf8_intact() -> None:
+    raw = io.BytesIO()
+    uart = PL011UART(output=io.TextIOWrapper(raw, encoding="utf-8"))
+    for byte in "héllo\n".encode():
+        uart.write(PL011UART.DR, 4, byte)
+    assert raw.getvalue().decode() == "héllo\n"
+
+
+def test_rx_input_and_flags() -> None:
+    uart = PL011UART(output=io.StringIO())
+    assert uart.read(PL011UART.FR, 4) & PL011UART.FR_RXFE
+
+    uart.inject_input(b"ab")
+    assert not uart.read(PL011UART.FR, 4) & PL011UART.FR_RXFE
+    assert uart.read(PL011UART.DR, 4) == ord("a")
+    assert uart.read(PL011UART.DR, 4) == ord("b")
+    assert uart.read(PL011UART.DR, 4) == 0
+    assert uart.read(PL011UART.FR, 4) & PL011UART.FR_RXFE
+
+
+def test_control_registers_read_back() -> None:
+    uart = PL011UART(output=io.StringIO())
+    uart.write(PL011UART.CR, 4, PL011UART.CR_UARTEN | PL011UART.CR_TXE)
+    uart.write(PL011UART.IMSC, 4, PL011UART.INT_RX)
+    assert uart.read(PL011UART.CR, 4) == PL011UART.CR_UARTEN | PL011UART.CR_TXE
+    assert uart.read(PL011UART.IMSC, 4) == PL011UART.INT_RX
+
+    uart.inject_input(b"x")
+    assert uart.read(PL011UART.MIS, 4) == PL011UART.INT_RX
+    uart.write(PL011UART.ICR, 4, PL011UART.INT_RX)
+    assert uart.read(PL011UART.MIS, 4) == 0
+
+    # Unknown registers read as zero and ignore writes
+    uart.write(PL011UART.DMACR, 4, 0xFF)
+    assert uart.read(PL011UART.DMACR, 4) == 0
+
+
+def test_dr_write_goes_to_output_fd(tmp_path) -> None:
+    with open(tmp_path / "console", "w+") as out:
+        uart = PL011UART(output=out)
+        for byte in b"ok\n":
+            uart.write(PL011UART.DR, 4, byte)
+        # Written with os.write(), so nothing is left in the file object
+        assert (tmp_path / "console").read_bytes() == b"ok\n"
+
+
+def test_flush_after_output_closed_does_not_reuse_fd(tmp_path) -> None:
+    with open(tmp_path / "console", "w") as out:
+        uart = PL011UART(output=out)
+        uart.write(PL011UART.DR, 4, ord("x"))
+    # The closed stream's fd number is handed out again
+    with open(tmp_path / "other", "wb"):
+        uart.flush()
+    assert (tmp_path / "other").read_bytes() == b""
+
+
+class FakeGIC:
+    def __init__(self) -> None:
+        self.lines: list[tuple[int, bool]] = []
+
+    def inject_irq(self, irq: int, level: bool = True) -> None:
+        self.lines.append((irq, level))
+
+
+def test_rx_interrupt_follows_buffer_level() -> None:
+    gic = FakeGIC()
+    uart = PL011UART(output=io.StringIO(), irq=33)
+    uart.set_gic(gic)
+    uart.write(PL011UART.IMSC, 4, PL011UART.INT_RX)
+
+    uart.inject_input(b"abc")
+    assert gic.lines == [(33, True)]
+    for _ in range(3):
+        uart.read(PL011UART.DR, 4)
+    # Asserted once while data was pending, released once it ran out
+    assert gic.lines == [(33, True), (33, False)]
+
+
+def test_rx_interrupt_raised_again_after_partial_drain() -> None:
+    gic = FakeGIC()
+    uart = PL011UART(output=io.StringIO(), irq=33)
+    uart.set_gic(gic)
+    uart.write(PL011UART.IMSC, 4, PL011UART.INT_RX)
+    uart.inject_input(b"abc")
+
+    # Like Linux's handler: clear RX first, then read some of the FIFO
+    uart.write(PL011UART.ICR, 4, PL011UART.INT_RX)
+    uart.read(PL011UART.DR, 4)
+    assert uart.read(PL011UART.MIS, 4) == PL011UART.INT_RX
+    assert gic.lines == [(33, True), (33, False), (33, True)]